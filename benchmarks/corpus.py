@@ -0,0 +1,116 @@
+# Synthetic scale-up corpus for the benchmarks (seeded by data/space_records.csv):
+
+# Titles and summaries are resampled independently from the seed records, then
+#     - some records get extra country / entity aliases (from the classify.py lexicons)
+#     - some records get an na_phrases phrase (so the filters have something to drop)
+# and the records are split into raw frames shaped like each API's fetch output (make_*_df / get_google_articles),
+# ready for categorize_records. The same seed and size always give the same corpus.
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from classify import adversary_words, countries, entities, na_phrases, security_words, space_words  # noqa: E402
+from matcher import word_pattern  # noqa: E402
+
+SEED_FILE = ROOT / "data" / "space_records.csv"
+ALIAS_RATE = 0.3  #share of records with an extra alias sentence
+NOISE_RATE = 0.05  #share of records with an na_phrases phrase
+PERIOD_END = pd.Timestamp("2026-01-18", tz="UTC")
+PERIOD_DAYS = 30
+#share of records per source (the seed file has no GDELT rows, so sources are assigned rather than resampled)
+SOURCE_SHARES = {"spaceflight_news": 0.5, "google_news": 0.3, "gdelt": 0.2}
+
+_templates = [
+    "{alias} officials commented on the mission.",
+    "The program involves {alias} and partners.",
+    "Analysts linked the test to {alias}.",
+]
+
+
+def parse_size(value: str) -> int:
+    """
+    10k / 100k / 1m / 2500 → number of records
+    """
+    value = value.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(value[-1], 1)
+    return int(float(value[:-1] if scale > 1 else value) * scale)
+
+
+def load_seed(seed_file=SEED_FILE) -> pd.DataFrame:
+    seed = pd.read_csv(seed_file, usecols=["title", "summary"])
+    seed["title"] = seed["title"].fillna("").astype(str)
+    seed["summary"] = seed["summary"].fillna("").astype(str)
+    return seed[seed["title"].str.strip() != ""].reset_index(drop=True)
+
+
+def make_corpus(size: int, seed: int = 0, seed_file=SEED_FILE) -> pd.DataFrame:
+    """
+    size records: title, summary, source_api (SOURCE_SHARES), published (last PERIOD_DAYS days), key (unique).
+    """
+    rng = np.random.default_rng(seed)
+    base = load_seed(seed_file)
+
+    titles = base["title"].to_numpy()[rng.integers(len(base), size=size)]
+    summaries = base["summary"].to_numpy()[rng.integers(len(base), size=size)]
+    source_api = rng.choice(list(SOURCE_SHARES), size=size, p=list(SOURCE_SHARES.values()))
+
+    aliases = np.array([alias for lexicon in (countries, entities) for names in lexicon.values() for alias in names], dtype=object)
+    templates = np.array(_templates, dtype=object)
+    with_alias = np.flatnonzero(rng.random(size) < ALIAS_RATE)
+    picked = aliases[rng.integers(len(aliases), size=len(with_alias))]
+    sentences = templates[rng.integers(len(templates), size=len(with_alias))]
+    summaries = summaries.copy()
+    summaries[with_alias] = [f"{s} {t.format(alias=a.title())}" for s, t, a in zip(summaries[with_alias], sentences, picked)]
+
+    noisy = np.flatnonzero(rng.random(size) < NOISE_RATE)
+    phrases = np.array(na_phrases, dtype=object)[rng.integers(len(na_phrases), size=len(noisy))]
+    titles = titles.copy()
+    titles[noisy] = [f"{t} as {p}" for t, p in zip(titles[noisy], phrases)]
+
+    seconds = rng.integers(PERIOD_DAYS * 86400, size=size)
+    published = PERIOD_END - pd.to_timedelta(np.sort(seconds)[::-1], unit="s")
+
+    return pd.DataFrame({
+        "title": titles,
+        "summary": summaries,
+        "source_api": source_api,
+        "published": published,
+        "key": np.arange(size),
+    })
+
+
+def raw_frames(corpus: pd.DataFrame) -> dict:
+    """
+    {source_api: raw frame in that API's fetch format} (GDELT has titles only, plus the has_* flags of fetch_sources).
+    """
+    frames = {}
+    for source_api, part in corpus.groupby("source_api", sort=True):
+        part = part.reset_index(drop=True)
+        published = part["published"].dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+        if source_api == "spaceflight_news":
+            frames[source_api] = pd.DataFrame({
+                "id": part["key"], "title": part["title"], "summary": part["summary"],
+                "news_site": "SpaceNews", "published_at": published, "source": "Spaceflight News API",
+            })
+        elif source_api == "google_news":
+            frames[source_api] = pd.DataFrame({
+                "title": part["title"], "summary": part["summary"], "url": "https://news.example/" + part["key"].astype(str),
+                "published": published, "source": "Google News",
+            })
+        elif source_api == "gdelt":
+            titles = part["title"].str.lower()
+            frames[source_api] = pd.DataFrame({
+                "title": part["title"], "sourcecountry": "", "seendate": part["published"].dt.strftime("%Y%m%dT%H%M%SZ"),
+                "url": "https://gdelt.example/" + part["key"].astype(str), "source": "GDELT DOC 2.0",
+                "has_space": titles.str.contains(word_pattern(tuple(space_words))),
+                "has_security": titles.str.contains(word_pattern(tuple(security_words))),
+                "has_adversary": titles.str.contains(word_pattern(tuple(adversary_words))),
+            })
+    return frames
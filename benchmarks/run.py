@@ -0,0 +1,215 @@
+# Benchmarks for the tagging / loading hot paths:
+
+#     python benchmarks/run.py                              (10k and 100k corpora, tagging only)
+#     python benchmarks/run.py --sizes 1m --repeat 1
+#     python benchmarks/run.py --database astrawatch_bench  (+ insert_records, view refresh and export)
+#     python benchmarks/run.py --save-baseline              (current results become benchmarks/baseline.json)
+
+# Each run writes benchmarks/results/<timestamp>.json and compares every throughput (records/s) with the
+# baseline: a benchmark more than --tolerance slower than its baseline is reported and the exit code is 1,
+# so a nightly job can run this before the pipeline. The committed baseline.json was recorded on a reference
+# machine (see its "machine" / "cpu_count"): a CI runner should re-record it once with --save-baseline.
+# The database benchmarks empty space_records of --database first: use a copy of the AstraWatch schema
+# (ex. createdb -T astrawatch astrawatch_bench), never the database the pipeline writes to.
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from corpus import ROOT, make_corpus, parse_size, raw_frames
+
+BENCH_DIR = Path(__file__).resolve().parent
+BASELINE_FILE = BENCH_DIR / "baseline.json"
+RESULTS_DIR = BENCH_DIR / "results"
+TOLERANCE = 0.25  #allowed throughput drop before a benchmark counts as a regression
+
+
+def _best(func, repeat: int, setup=None) -> float:
+    """
+    Fastest of `repeat` runs, in seconds (setup runs before each one, untimed).
+    """
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def _record(results: dict, name: str, size_label: str, records: int, seconds: float):
+    results[f"{name}@{size_label}"] = {
+        "records": records,
+        "seconds": round(seconds, 6),
+        "per_second": round(records / seconds, 1) if seconds else None,
+    }
+    print(f"  {name:<40} {records:>9} records {seconds:>9.3f} s {records / seconds:>12,.0f} /s")
+
+
+def bench_tagging(results: dict, size_label: str, corpus, repeat: int, sample: int, workers: int):
+    import classify
+    import oss
+    from dedup import mark_near_duplicates
+
+    texts = (corpus["title"] + " " + corpus["summary"]).tolist()[:sample]
+    per_record = {
+        "address_text_issues": classify.address_text_issues,
+        "contains": lambda text: classify.contains(text, classify.space_words),
+        "classify_event": classify.classify_event,
+        "classify_countries": classify.classify_countries,
+        "classify_entity": classify.classify_entity,
+    }
+    #every function starts from raw text, with no normalized text left over from the previous one
+    for name, func in per_record.items():
+        seconds = _best(lambda: [func(text) for text in texts], repeat, setup=classify._normalize_text.cache_clear)
+        _record(results, name, size_label, len(texts), seconds)
+
+    frames = raw_frames(corpus)
+    for source_api, df in frames.items():
+        seconds = _best(lambda: oss.categorize_records(df, source_api), repeat, setup=classify._normalize_text.cache_clear)
+        _record(results, f"categorize_records[{source_api}]", size_label, len(df), seconds)
+
+    if workers != 1:
+        seconds = _best(lambda: oss.categorize_sources(frames, workers=workers), repeat, setup=classify._normalize_text.cache_clear)
+        _record(results, f"categorize_sources[workers={workers}]", size_label, len(corpus), seconds)
+
+    records = oss.categorize_sources(frames)
+    seconds = _best(lambda: mark_near_duplicates(records), repeat)
+    _record(results, "mark_near_duplicates", size_label, len(records), seconds)
+    return records
+
+
+def bench_database(results: dict, size_label: str, records, repeat: int):
+    import oss
+    from connection import get_cursor
+
+    def empty_tables():
+        with get_cursor() as cursor:
+            cursor.execute("TRUNCATE space_records CASCADE;")
+
+    seconds = _best(lambda: oss.insert_records(records, near_duplicates="off"), repeat, setup=empty_tables)
+    _record(results, "insert_records", size_label, len(records), seconds)
+
+    seconds = _best(oss.refresh_materialized_views, repeat)
+    _record(results, "refresh_materialized_views", size_label, len(records), seconds)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output_file = Path(tmp) / "tableau_data.xlsx"
+
+        def remove_export():
+            for path in Path(tmp).glob("tableau_data*"):
+                path.unlink()
+
+        seconds = _best(lambda: oss.export_views_to_excel(output_file), repeat, setup=remove_export)
+        _record(results, "export_views_to_excel", size_label, len(records), seconds)
+
+        #second export of the same data: every sheet is reused
+        seconds = _best(lambda: oss.export_views_to_excel(output_file), repeat)
+        _record(results, "export_views_to_excel[unchanged]", size_label, len(records), seconds)
+
+    oss.close_connection()
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Names of the benchmarks whose throughput fell more than `tolerance` below the baseline.
+    """
+    regressions = []
+    print(f"\n{'benchmark':<52} {'baseline /s':>12} {'now /s':>12} {'change':>8}")
+    for name, result in results.items():
+        before = baseline.get(name, {}).get("per_second")
+        if not before or not result["per_second"]:
+            continue
+        change = result["per_second"] / before - 1
+        flag = "  REGRESSION" if change < -tolerance else ""
+        print(f"{name:<52} {before:>12,.0f} {result['per_second']:>12,.0f} {change:>+8.1%}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AstraWatch hot-path benchmarks on a synthetic corpus.")
+    parser.add_argument("--sizes", nargs="+", default=["10k", "100k"], help="corpus sizes, ex. 10k 100k 1m")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark (the fastest is kept)")
+    parser.add_argument("--sample", type=int, default=100_000, help="records per single-record function benchmark")
+    parser.add_argument("--workers", type=int, default=1, help="also time categorize_sources with this many processes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database", help="database for insert / refresh / export (its space_records is emptied)")
+    parser.add_argument("--baseline", default=BASELINE_FILE, type=Path)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--output", type=Path, help="results file (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    args = parser.parse_args(argv)
+
+    if args.database:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        if args.database == os.getenv("DATABASE"):
+            parser.error(f"--database {args.database} is the pipeline's database; benchmark on a copy")
+        os.environ["DATABASE"] = args.database  #read by connection.py on import
+
+    results = {}
+    for size_label in args.sizes:
+        size = parse_size(size_label)
+        print(f"\nCorpus {size_label} ({size} records)")
+        corpus = make_corpus(size, seed=args.seed)
+
+        records = bench_tagging(results, size_label, corpus, args.repeat, args.sample, args.workers)
+        if args.database:
+            bench_database(results, size_label, records, args.repeat)
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "results": results,
+    }
+
+    output = args.output or RESULTS_DIR / f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults → {output}")
+
+    regressions = []
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+        if (baseline.get("machine"), baseline.get("cpu_count")) != (report["machine"], report["cpu_count"]):
+            print(f"Baseline recorded on another machine ({baseline.get('machine')}, {baseline.get('cpu_count')} CPUs): "
+                  "re-record it on this one with --save-baseline")
+        regressions = compare(results, baseline["results"], args.tolerance)
+    else:
+        print(f"No baseline at {args.baseline} (create one with --save-baseline)")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f"Baseline → {args.baseline}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
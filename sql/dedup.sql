@@ -0,0 +1,15 @@
+/*
+dedup.sql: near-duplicate columns written by oss.py insert_records (see dedup.py).
+    simhash:            64-bit SimHash of the normalized title + summary
+    canonical_event_id: set when the record is a near-duplicate (NEAR_DUP_MODE=flag) of an earlier record
+Run before mentions.sql / views.sql / tableau.sql (the views only count canonical records).
+*/
+
+ALTER TABLE space_records ADD COLUMN IF NOT EXISTS simhash BIGINT;
+ALTER TABLE space_records ADD COLUMN IF NOT EXISTS canonical_event_id INT REFERENCES space_records (event_id);
+
+-- Recent canonical fingerprints (loaded into memory before each insert)
+CREATE INDEX IF NOT EXISTS idx_space_records_recent_simhash
+    ON space_records (published_date)
+    INCLUDE (source_api, raw_source, simhash)
+    WHERE canonical_event_id IS NULL AND simhash IS NOT NULL;
@@ -0,0 +1,40 @@
+/*
+dimensions.sql: canonical country / entity dimensions, so joins are integer lookups instead of name matching.
+dim_country / dim_entity rows are upserted by oss.py from lexicons/countries.json and entities.json (ids are kept
+when the lexicons change), and records store their tags as ids as well (space_records.country_ids / entity_ids,
+event_mentions.dim_id). dim_country carries each country's latest GPI (refreshed from peace_index by the pipeline,
+joined on the ISO3 code), so no view needs an alias mapping or a per-row scan of peace_index.
+Run after mentions.sql and lexicon.sql, before views.sql and tableau.sql. Ids of records stored before are filled
+in by the next pipeline run (oss.sync_dimensions).
+*/
+
+CREATE TABLE IF NOT EXISTS dim_country (
+    country_id  INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    name        TEXT NOT NULL UNIQUE,
+    iso3        TEXT,
+    aliases     TEXT[] NOT NULL DEFAULT '{}',
+    gpi_year    INT,
+    gpi_rank    INT,
+    gpi_score   NUMERIC
+);
+
+CREATE INDEX IF NOT EXISTS idx_dim_country_iso3 ON dim_country (iso3);
+
+CREATE TABLE IF NOT EXISTS dim_entity (
+    entity_id   INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    name        TEXT NOT NULL UNIQUE,
+    aliases     TEXT[] NOT NULL DEFAULT '{}'
+);
+
+-- NULL until the ids of a record stored before this file are filled in
+ALTER TABLE space_records ADD COLUMN IF NOT EXISTS country_ids INT[];
+ALTER TABLE space_records ADD COLUMN IF NOT EXISTS entity_ids INT[];
+
+-- Array containment / overlap lookups on ids (country_ids @> '{3}')
+CREATE INDEX IF NOT EXISTS idx_space_records_country_ids_gin ON space_records USING GIN (country_ids);
+CREATE INDEX IF NOT EXISTS idx_space_records_entity_ids_gin ON space_records USING GIN (entity_ids);
+
+-- dim_country.country_id or dim_entity.entity_id (by mention_type); NULL for a name outside the lexicons
+ALTER TABLE event_mentions ADD COLUMN IF NOT EXISTS dim_id INT;
+
+CREATE INDEX IF NOT EXISTS idx_event_mentions_dim_date ON event_mentions (mention_type, dim_id, published_date);
@@ -0,0 +1,10 @@
+/*
+ingestion.sql keeps per-source state for incremental runs of oss.py
+*/
+
+-- Latest published date fetched per source (watermark)
+CREATE TABLE IF NOT EXISTS ingestion_state (
+    source_api     TEXT PRIMARY KEY,
+    last_published TIMESTAMPTZ,
+    updated_at     TIMESTAMPTZ NOT NULL DEFAULT now()
+);
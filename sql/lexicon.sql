@@ -0,0 +1,12 @@
+/*
+lexicon.sql: lexicon version of each record, written by oss.py insert_records and the retag functions (see lexicon.py).
+    lexicon_version: content hash of the country / entity lexicons the record was tagged / last retagged with
+                     (NULL for records stored before versions existed)
+    source_country:  GDELT publisher country (lexicon name), which is not in the text: retag adds it back to countries
+                     (NULL for other sources, and for GDELT records stored before this column)
+Run once on an existing database; retag_stale_records (python src/cli.py retag) only touches records whose
+version differs from the current one.
+*/
+
+ALTER TABLE space_records ADD COLUMN IF NOT EXISTS lexicon_version TEXT;
+ALTER TABLE space_records ADD COLUMN IF NOT EXISTS source_country TEXT;
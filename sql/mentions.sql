@@ -0,0 +1,37 @@
+/*
+mentions.sql: one row per (event, country / entity) mention, so per-country and per-entity queries
+are index range scans instead of unnesting space_records.countries / entities on every read.
+Rows are written by oss.py in the same transaction as insert_records and the retag functions
+(near-duplicates flagged with canonical_event_id get none). Run after dedup.sql, before views.sql and tableau.sql.
+*/
+
+CREATE TABLE IF NOT EXISTS event_mentions (
+    event_id            INT NOT NULL REFERENCES space_records (event_id) ON DELETE CASCADE,
+    mention_type        TEXT NOT NULL CHECK (mention_type IN ('country', 'entity')),
+    mention_id          TEXT NOT NULL,
+    published_date      TIMESTAMPTZ,
+    is_security_related BOOLEAN,
+    PRIMARY KEY (event_id, mention_type, mention_id)
+);
+
+-- Time series for one country / entity
+CREATE INDEX IF NOT EXISTS idx_event_mentions_mention_date ON event_mentions (mention_id, published_date);
+
+-- Security-related mentions (baseline views)
+CREATE INDEX IF NOT EXISTS idx_event_mentions_security
+    ON event_mentions (mention_type, mention_id, published_date)
+    WHERE is_security_related = TRUE;
+
+-- Backfill records inserted before this table existed
+INSERT INTO event_mentions (event_id, mention_type, mention_id, published_date, is_security_related)
+SELECT DISTINCT r.event_id, m.mention_type, m.mention_id, r.published_date, r.is_security_related
+FROM space_records r
+CROSS JOIN LATERAL (
+    SELECT 'country' AS mention_type, unnest(r.countries) AS mention_id
+    UNION ALL
+    SELECT 'entity', unnest(r.entities)
+) m
+WHERE r.canonical_event_id IS NULL
+  AND m.mention_id IS NOT NULL
+  AND btrim(m.mention_id) <> ''
+ON CONFLICT DO NOTHING;
@@ -1,14 +1,12 @@
--- Table 1: All rDROP VIEW IF EXISTS v_tableau_space_records;
-
-CREATE VIEW v_tableau_space_records AS
-WITH gpi_latest AS (
-  SELECT DISTINCT ON (country)
-         country,
-         gpi_rank,
-         gpi_score
-  FROM peace_index
-  ORDER BY country, year DESC
-)
+/*
+tableau.sql: record-level tables for Tableau.
+Both are materialized (mv_*) with unique indexes, refreshed CONCURRENTLY by oss.py after new inserts;
+the v_* views read them under the original names. Run views.sql first (v_space_headlines_period).
+Countries and their latest GPI come from dim_country (dimensions.sql), looked up by id.
+*/
+
+-- Table 1: All records with their countries' latest GPI (dim_country) and ML headline cluster
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_tableau_space_records AS
 SELECT
   r.event_id,
   r.published_date,
@@ -45,23 +43,16 @@ LEFT JOIN LATERAL (
     COALESCE(
       jsonb_agg(
         jsonb_build_object(
-          'country', d.country,
-          'gpi_rank', gl.gpi_rank,
-          'gpi_score', gl.gpi_score
+          'country', d.name,
+          'gpi_rank', d.gpi_rank,
+          'gpi_score', d.gpi_score
         )
-        ORDER BY (gl.gpi_rank IS NULL), gl.gpi_rank, d.country
+        ORDER BY (d.gpi_rank IS NULL), d.gpi_rank, d.name
       ),
       '[]'::jsonb
     ) AS countries_gpi
-  FROM (
-    SELECT DISTINCT unnest(COALESCE(r.countries, ARRAY[]::text[])) AS country
-  ) d
-  LEFT JOIN gpi_latest gl
-    ON gl.country = CASE
-      WHEN d.country IN ('United States', 'US', 'U.S.', 'USA') THEN 'United States of America'
-      WHEN d.country IN ('Turkey', 'Türkiye', 'T&uuml;rkiye') THEN 'Turkiye'
-      ELSE d.country
-    END
+  FROM dim_country d
+  WHERE d.country_id = ANY(r.country_ids)
 ) g ON TRUE
 
 LEFT JOIN LATERAL (
@@ -73,73 +64,40 @@ LEFT JOIN LATERAL (
   LIMIT 1
 ) h ON TRUE
 
-WHERE COALESCE(cardinality(r.countries), 0) > 0
-   OR COALESCE(cardinality(r.entities), 0) > 0;
+WHERE r.canonical_event_id IS NULL  -- near-duplicates count once (dedup.sql)
+  AND (COALESCE(cardinality(r.countries), 0) > 0
+   OR COALESCE(cardinality(r.entities), 0) > 0);
 
--- Table 2: Unnests the countries/entities along with corresponding peace rank for analysis
-DROP VIEW IF EXISTS v_space_mentions;
+CREATE UNIQUE INDEX IF NOT EXISTS mv_tableau_space_records_key ON mv_tableau_space_records (event_id);
+CREATE INDEX IF NOT EXISTS mv_tableau_space_records_date ON mv_tableau_space_records (published_date);
 
-CREATE VIEW v_space_mentions AS
-WITH gpi_latest AS (
-  -- Latest available row per country (avoids nulls if some countries miss the global max year)
-  SELECT DISTINCT ON (country)
-         country,
-         gpi_rank,
-         gpi_score
-  FROM peace_index
-  ORDER BY country, year DESC
-),
+CREATE OR REPLACE VIEW v_tableau_space_records AS
+SELECT * FROM mv_tableau_space_records;
 
-country_mentions AS (
-  SELECT
-    r.event_id,
-    r.published_date,
-    r.source,
-    r.source_api,
-    r.event_type,
-    r.is_security_related,
-
-    'country'::text AS mention_type,
-    c.country       AS mention_value,
-
-    gl.gpi_rank,
-    gl.gpi_score
-  FROM space_records r
-  CROSS JOIN LATERAL (
-    SELECT DISTINCT unnest(COALESCE(r.countries, ARRAY[]::text[])) AS country
-  ) c
-  LEFT JOIN gpi_latest gl
-    ON gl.country = CASE
-      WHEN c.country IN ('United States', 'US', 'U.S.', 'USA') THEN 'United States of America'
-      WHEN c.country IN ('Turkey', 'Türkiye', 'T&uuml;rkiye') THEN 'Turkiye'
-      ELSE c.country
-    END
-  WHERE c.country IS NOT NULL
-    AND btrim(c.country) <> ''
-),
-
-entity_mentions AS (
-  SELECT
-    r.event_id,
-    r.published_date,
-    r.source,
-    r.source_api,
-    r.event_type,
-    r.is_security_related,
-
-    'entity'::text AS mention_type,
-    e.entity        AS mention_value,
-
-    NULL::int       AS gpi_rank,
-    NULL::numeric   AS gpi_score
-  FROM space_records r
-  CROSS JOIN LATERAL (
-    SELECT DISTINCT unnest(COALESCE(r.entities, ARRAY[]::text[])) AS entity
-  ) e
-  WHERE e.entity IS NOT NULL
-    AND btrim(e.entity) <> ''
-)
-
-SELECT * FROM country_mentions
-UNION ALL
-SELECT * FROM entity_mentions;
+-- Table 2: One row per country/entity mention (event_mentions, see mentions.sql) with the country's peace rank
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_space_mentions AS
+SELECT
+  r.event_id,
+  r.published_date,
+  r.source,
+  r.source_api,
+  r.event_type,
+  r.is_security_related,
+
+  m.mention_type,
+  m.mention_id AS mention_value,
+
+  d.gpi_rank,
+  d.gpi_score
+FROM event_mentions m
+JOIN space_records r
+  ON r.event_id = m.event_id
+LEFT JOIN dim_country d
+  ON m.mention_type = 'country'
+ AND d.country_id = m.dim_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS mv_space_mentions_key ON mv_space_mentions (event_id, mention_type, mention_value);
+CREATE INDEX IF NOT EXISTS mv_space_mentions_value_date ON mv_space_mentions (mention_value, published_date);
+
+CREATE OR REPLACE VIEW v_space_mentions AS
+SELECT * FROM mv_space_mentions;
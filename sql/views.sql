@@ -2,12 +2,36 @@
 views.sql supports analysis and subsequent visualization via Tableau
 */
 
+------------------------------------------------------------
+-- 0. INDEXES ON space_records
+------------------------------------------------------------
+
+-- Array containment / overlap lookups (countries @> '{China}', entities && '{SpaceX}')
+CREATE INDEX IF NOT EXISTS idx_space_records_countries_gin ON space_records USING GIN (countries);
+CREATE INDEX IF NOT EXISTS idx_space_records_entities_gin ON space_records USING GIN (entities);
+
+-- Security-related subset used by every baseline view
+CREATE INDEX IF NOT EXISTS idx_space_records_security_date
+    ON space_records (published_date)
+    WHERE is_security_related = TRUE;
+
+CREATE INDEX IF NOT EXISTS idx_space_records_space_security_event
+    ON space_records (published_date)
+    WHERE is_space_related = TRUE AND event_type = 'security_event';
+
+/*
+Sections 1-4 are materialized (mv_*) so dashboard / export reads don't rescan and unnest space_records.
+The v_* views keep their names and columns for Tableau and export_views_to_excel, and simply read the mv_*.
+Each mv_* has a unique index, so oss.py can REFRESH MATERIALIZED VIEW CONCURRENTLY after new inserts
+(readers are never blocked). To change an mv_* definition, drop it first: CREATE ... IF NOT EXISTS keeps the old one.
+*/
+
 ------------------------------------------------------------
 -- 1. INITIAL BASELINE VIEWS
 ------------------------------------------------------------
 
 -- Baseline: security-related records
-CREATE OR REPLACE VIEW v_baseline_filter AS
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_baseline_filter AS
 SELECT
     sr.event_id,
     sr.published_date,
@@ -18,13 +42,19 @@ SELECT
     sr.entities
 FROM space_records sr
 WHERE sr.is_security_related = TRUE
+  AND sr.canonical_event_id IS NULL  -- near-duplicates count once (dedup.sql)
   AND NOT (
     sr.countries = '{}'
     AND sr.entities = '{}'
   );
 
+CREATE UNIQUE INDEX IF NOT EXISTS mv_baseline_filter_key ON mv_baseline_filter (event_id);
+
+CREATE OR REPLACE VIEW v_baseline_filter AS
+SELECT * FROM mv_baseline_filter;
+
 -- STRICT Baseline: space+security-related records
-CREATE OR REPLACE VIEW v_baseline_space_security AS
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_baseline_space_security AS
 SELECT
     sr.event_id,
     sr.published_date,
@@ -38,95 +68,151 @@ SELECT
 FROM space_records sr
 WHERE sr.is_space_related = TRUE
   AND sr.event_type = 'security_event'
+  AND sr.canonical_event_id IS NULL  -- near-duplicates count once (dedup.sql)
   AND NOT (
     sr.countries = '{}'
     AND sr.entities = '{}'
   );
 
+CREATE UNIQUE INDEX IF NOT EXISTS mv_baseline_space_security_key ON mv_baseline_space_security (event_id);
+
+CREATE OR REPLACE VIEW v_baseline_space_security AS
+SELECT * FROM mv_baseline_space_security;
+
 ------------------------------------------------------------
 -- 2. CONSOLIDATION: COUNTRY / ENTITY
 ------------------------------------------------------------
+-- Sections 2-4 read event_mentions (mentions.sql): security-related mentions are exactly the
+-- countries / entities of v_baseline_filter records, without unnesting the arrays again.
 
 -- Security events by country
-CREATE OR REPLACE VIEW v_security_events_by_country AS
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_security_events_by_country AS
 SELECT
-    c.country,
+    m.mention_id AS country,
     COUNT(*) AS event_count
-FROM v_baseline_filter bf
-CROSS JOIN LATERAL unnest(bf.countries) AS c(country)
-GROUP BY c.country;
+FROM event_mentions m
+WHERE m.mention_type = 'country'
+  AND m.is_security_related = TRUE
+GROUP BY m.mention_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS mv_security_events_by_country_key ON mv_security_events_by_country (country);
+
+CREATE OR REPLACE VIEW v_security_events_by_country AS
+SELECT * FROM mv_security_events_by_country;
 
 -- Security events by entity
-CREATE OR REPLACE VIEW v_security_events_by_entity AS
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_security_events_by_entity AS
 SELECT
-    e.entity,
+    m.mention_id AS entity,
     COUNT(*) AS event_count
-FROM v_baseline_filter bf
-CROSS JOIN LATERAL unnest(bf.entities) AS e(entity)
-GROUP BY e.entity;
+FROM event_mentions m
+WHERE m.mention_type = 'entity'
+  AND m.is_security_related = TRUE
+GROUP BY m.mention_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS mv_security_events_by_entity_key ON mv_security_events_by_entity (entity);
+
+CREATE OR REPLACE VIEW v_security_events_by_entity AS
+SELECT * FROM mv_security_events_by_entity;
 
 ------------------------------------------------------------
 -- 3. TIME OVER TIME TRENDS
 ------------------------------------------------------------
 
 -- Weekly security trends by country
-CREATE OR REPLACE VIEW v_weekly_country_trends AS
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_weekly_country_trends AS
 SELECT
-    date_trunc('week', bf.published_date) AS week,
-    c.country,
+    date_trunc('week', m.published_date) AS week,
+    m.mention_id AS country,
     COUNT(*) AS event_count
-FROM v_baseline_filter bf
-CROSS JOIN LATERAL unnest(bf.countries) AS c(country)
-GROUP BY week, c.country;
+FROM event_mentions m
+WHERE m.mention_type = 'country'
+  AND m.is_security_related = TRUE
+GROUP BY week, m.mention_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS mv_weekly_country_trends_key ON mv_weekly_country_trends (country, week);
+
+CREATE OR REPLACE VIEW v_weekly_country_trends AS
+SELECT * FROM mv_weekly_country_trends;
 
 -- Weekly security trends by entity
-CREATE OR REPLACE VIEW v_weekly_entity_trends AS
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_weekly_entity_trends AS
 SELECT
-    date_trunc('week', bf.published_date) AS week,
-    e.entity,
+    date_trunc('week', m.published_date) AS week,
+    m.mention_id AS entity,
     COUNT(*) AS event_count
-FROM v_baseline_filter bf
-CROSS JOIN LATERAL unnest(bf.entities) AS e(entity)
-GROUP BY week, e.entity;
+FROM event_mentions m
+WHERE m.mention_type = 'entity'
+  AND m.is_security_related = TRUE
+GROUP BY week, m.mention_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS mv_weekly_entity_trends_key ON mv_weekly_entity_trends (entity, week);
+
+CREATE OR REPLACE VIEW v_weekly_entity_trends AS
+SELECT * FROM mv_weekly_entity_trends;
 
 ------------------------------------------------------------
 -- 4. WHO IS DOING WHAT WITH WHOM/WHERE
 ------------------------------------------------------------
 
 -- Countries working together (joint appearance in events)
-CREATE OR REPLACE VIEW v_country_cooccurrence AS
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_country_cooccurrence AS
 SELECT
-    c1.country AS country_a,
-    c2.country AS country_b,
+    c1.mention_id AS country_a,
+    c2.mention_id AS country_b,
     COUNT(*) AS co_occurrence_count
-FROM v_baseline_filter bf
-CROSS JOIN LATERAL unnest(bf.countries) AS c1(country)
-CROSS JOIN LATERAL unnest(bf.countries) AS c2(country)
-WHERE c1.country < c2.country
+FROM event_mentions c1
+JOIN event_mentions c2
+  ON c2.event_id = c1.event_id
+ AND c2.mention_type = 'country'
+ AND c1.mention_id < c2.mention_id
+WHERE c1.mention_type = 'country'
+  AND c1.is_security_related = TRUE
 GROUP BY country_a, country_b;
 
+CREATE UNIQUE INDEX IF NOT EXISTS mv_country_cooccurrence_key ON mv_country_cooccurrence (country_a, country_b);
+
+CREATE OR REPLACE VIEW v_country_cooccurrence AS
+SELECT * FROM mv_country_cooccurrence;
+
 -- Entity co-occurrence
-CREATE OR REPLACE VIEW v_entity_cooccurrence AS
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_entity_cooccurrence AS
 SELECT
-    e1.entity AS entity_a,
-    e2.entity AS entity_b,
+    e1.mention_id AS entity_a,
+    e2.mention_id AS entity_b,
     COUNT(*) AS co_occurrence_count
-FROM v_baseline_filter bf
-CROSS JOIN LATERAL unnest(bf.entities) AS e1(entity)
-CROSS JOIN LATERAL unnest(bf.entities) AS e2(entity)
-WHERE e1.entity < e2.entity
+FROM event_mentions e1
+JOIN event_mentions e2
+  ON e2.event_id = e1.event_id
+ AND e2.mention_type = 'entity'
+ AND e1.mention_id < e2.mention_id
+WHERE e1.mention_type = 'entity'
+  AND e1.is_security_related = TRUE
 GROUP BY entity_a, entity_b;
 
+CREATE UNIQUE INDEX IF NOT EXISTS mv_entity_cooccurrence_key ON mv_entity_cooccurrence (entity_a, entity_b);
+
+CREATE OR REPLACE VIEW v_entity_cooccurrence AS
+SELECT * FROM mv_entity_cooccurrence;
+
 -- Country–entity shared records
-CREATE OR REPLACE VIEW v_country_entity_shared AS
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_country_entity_shared AS
 SELECT
-    c.country,
-    e.entity,
+    c.mention_id AS country,
+    e.mention_id AS entity,
     COUNT(*) AS shared_event_count
-FROM v_baseline_filter bf
-CROSS JOIN LATERAL unnest(bf.countries) AS c(country)
-CROSS JOIN LATERAL unnest(bf.entities) AS e(entity)
-GROUP BY c.country, e.entity;
+FROM event_mentions c
+JOIN event_mentions e
+  ON e.event_id = c.event_id
+ AND e.mention_type = 'entity'
+WHERE c.mention_type = 'country'
+  AND c.is_security_related = TRUE
+GROUP BY c.mention_id, e.mention_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS mv_country_entity_shared_key ON mv_country_entity_shared (country, entity);
+
+CREATE OR REPLACE VIEW v_country_entity_shared AS
+SELECT * FROM mv_country_entity_shared;
 
 ------------------------------------------------------------
 -- 5. MACHINE-LEARNING HEADLINES
@@ -148,7 +234,8 @@ SELECT
     article_count
 FROM space_headlines_period;
 
-/* import weekly_headlines.csv into space_headlines_period_stg */
+/* import weekly_headlines.csv into space_headlines_period_stg
+   (only needed for notebook-generated files: the pipeline now inserts its headlines directly, see oss.update_headlines) */
 
 INSERT INTO space_headlines_period
 SELECT * FROM space_headlines_period_stg
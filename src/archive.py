@@ -0,0 +1,173 @@
+# Append-only archive of every classified record (replaces overwriting data/space_records.csv each run):
+
+#     data/archive/month=2025-12/source_api=gdelt/part-<run_id>.arrow
+#     data/archive/month=2025-12/source_api=gdelt/part-<run_id>.b00003.arrow   (streaming runs: one file per batch)
+
+# Each run adds one Arrow IPC file per (published month, source_api) partition and never rewrites older files.
+# read_archive only opens the partitions overlapping the requested dates / sources, reads only the requested
+# columns, and memory-maps the (uncompressed) files, so loading one week for clustering reads a file or two.
+
+import os
+import re
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+
+ARCHIVE_DIR = Path(__file__).resolve().parent.parent / "data" / "archive"
+
+#columns stored in every part file (source_api and the month come from the partition folders)
+SCHEMA = pa.schema([
+    ("published_date", pa.timestamp("ns", tz="UTC")),
+    ("time_classified", pa.timestamp("ns")),
+    ("title", pa.string()),
+    ("summary", pa.string()),
+    ("source", pa.string()),
+    ("raw_source", pa.string()),
+    ("event_type", pa.string()),
+    ("is_space_related", pa.bool_()),
+    ("is_security_related", pa.bool_()),
+    ("countries", pa.list_(pa.string())),
+    ("entities", pa.list_(pa.string())),
+    ("lexicon_version", pa.string()),  #added later: older part files are read with nulls
+    ("source_country", pa.string()),  #same (GDELT publisher country, see oss.classify_frame)
+])
+COLUMNS = SCHEMA.names + ["source_api"]
+
+_PART = re.compile(r"part-(?P<run_id>[^.]+)(?:\.b\d+)?\.arrow")
+
+
+def _utc(value):
+    if value is None:
+        return None
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def _month_overlaps(month: str, start, end) -> bool:
+    """
+    Partition pruning: True when the month=YYYY-MM folder can hold dates in [start, end).
+    """
+    if month == "unknown":
+        return start is None and end is None
+
+    month_start = pd.Timestamp(f"{month}-01", tz="UTC")
+    month_end = month_start + pd.offsets.MonthBegin(1)
+    return (start is None or month_end > start) and (end is None or month_start < end)
+
+
+def _text_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    String columns as str or None (ex. Spaceflight News ids in raw_source), as PostgreSQL stores them.
+    """
+    text = [field.name for field in SCHEMA if field.type == pa.string()]
+    return df.assign(**{col: [None if pd.isna(v) else str(v) for v in df[col]] for col in text})
+
+
+def _read_part(path: Path, columns: list) -> pa.Table:
+    """
+    columns of one part file, memory-mapped; SCHEMA columns the file predates come back as nulls.
+    """
+    with pa.memory_map(str(path)) as source:
+        names = pa.ipc.open_file(source).schema.names
+    table = feather.read_table(path, columns=[col for col in columns if col in names], memory_map=True)
+    for col in columns:
+        if col not in names:
+            table = table.append_column(SCHEMA.field(col), pa.nulls(len(table), SCHEMA.field(col).type))
+    return table.select(columns)
+
+
+def append_archive(df: pd.DataFrame, archive_dir=ARCHIVE_DIR, run_id: str = None, batch: int = None) -> str:
+    """
+    Adds a run's classified records (categorize_records format) to the archive, one new file per partition.
+    Files are written to a temp name and renamed, so readers never see a partial file.
+    A run that arrives in several batches passes the returned run id back with batch = 0, 1, 2...
+    Returns the run id (part-<run_id>.arrow), which read_archive can select.
+    """
+    archive_dir = Path(archive_dir)
+    run_id = run_id or f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+    published = pd.to_datetime(df["published_date"], utc=True)
+    months = published.dt.strftime("%Y-%m").fillna("unknown")
+
+    written = 0
+    for (month, source_api), part in df.assign(published_date=published).groupby([months, df["source_api"]], sort=True):
+        folder = archive_dir / f"month={month}" / f"source_api={source_api}"
+        folder.mkdir(parents=True, exist_ok=True)
+
+        path = folder / (f"part-{run_id}.arrow" if batch is None else f"part-{run_id}.b{batch:05d}.arrow")
+        tmp_path = path.with_suffix(".tmp")
+        for col in ("lexicon_version", "source_country"):
+            if col not in part.columns:
+                part = part.assign(**{col: None})
+        table = pa.Table.from_pandas(_text_columns(part[SCHEMA.names]), schema=SCHEMA, preserve_index=False)
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+        written += len(part)
+
+    print(f"Archived {written} records (run {run_id}{'' if batch is None else f', batch {batch}'}) under {archive_dir}")
+    return run_id
+
+
+def latest_run(archive_dir=ARCHIVE_DIR) -> str:
+    """
+    Run id of the most recent append_archive call (run ids start with their UTC timestamp), None if empty.
+    """
+    runs = [_PART.fullmatch(path.name)["run_id"] for path in Path(archive_dir).glob("month=*/source_api=*/part-*.arrow")]
+    return max(runs, default=None)
+
+
+def read_archive_table(archive_dir=ARCHIVE_DIR, columns: list = None, start=None, end=None,
+                       source_apis: list = None, run_id: str = None) -> pa.Table:
+    """
+    Archived records as an Arrow table (memory-mapped, no copy until converted).
+    start / end: published_date range [start, end); naive dates are taken as UTC.
+    Only partitions overlapping the range and in source_apis are opened, and only `columns` are read.
+    """
+    columns = list(columns or COLUMNS)
+    start, end = _utc(start), _utc(end)
+
+    read_cols = [col for col in SCHEMA.names if col in columns or (col == "published_date" and (start is not None or end is not None))]
+    parts = []
+
+    for month_dir in sorted(Path(archive_dir).glob("month=*")):
+        if not _month_overlaps(month_dir.name.split("=", 1)[1], start, end):
+            continue
+
+        for source_dir in sorted(month_dir.glob("source_api=*")):
+            source_api = source_dir.name.split("=", 1)[1]
+            if source_apis and source_api not in source_apis:
+                continue
+
+            for path in sorted(source_dir.glob(f"part-{run_id}*.arrow" if run_id else "part-*.arrow")):
+                if run_id and _PART.fullmatch(path.name)["run_id"] != run_id:
+                    continue
+                table = _read_part(path, read_cols)
+                if start is not None:
+                    table = table.filter(pc.greater_equal(table["published_date"], pa.scalar(start, SCHEMA.field("published_date").type)))
+                if end is not None:
+                    table = table.filter(pc.less(table["published_date"], pa.scalar(end, SCHEMA.field("published_date").type)))
+                if "source_api" in columns:
+                    table = table.append_column("source_api", pa.array([source_api] * len(table), pa.string()))
+                parts.append(table.select(columns))
+
+    if not parts:
+        return pa.schema([*SCHEMA, pa.field("source_api", pa.string())]).empty_table().select(columns)
+    return pa.concat_tables(parts)
+
+
+def read_archive(archive_dir=ARCHIVE_DIR, columns: list = None, start=None, end=None,
+                 source_apis: list = None, run_id: str = None) -> pd.DataFrame:
+    """
+    read_archive_table as a DataFrame in insert_records format (countries / entities as python lists).
+    """
+    df = read_archive_table(archive_dir, columns, start, end, source_apis, run_id).to_pandas()
+
+    for col in ("countries", "entities"):
+        if col in df:
+            df[col] = [list(values) if values is not None else [] for values in df[col]]
+    return df
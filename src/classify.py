@@ -0,0 +1,169 @@
+# Categorization / Tagging for the Outer Space Security Project:
+
+# Keyword groupings, lexicons (from lexicons/*.json) and the per-record classifiers used by oss.py.
+# Kept free of pandas / requests / database imports so a single record can be classified with a fast cold start.
+
+import re
+import unicodedata
+from functools import lru_cache
+
+import lexicon
+from matcher import NormalizedText, keyword_lookup
+
+#keyword groupings, event categories and country / entity lexicons: loaded from the versioned files in lexicons/
+#(see lexicon.py). reload_lexicons() swaps in edited files without a restart, updating these objects in place.
+_stamp = lexicon.file_stamp()
+_lexicons = lexicon.read_lexicons()
+_version = lexicon.content_hash(_lexicons)
+_tag_version = lexicon.tag_version(_lexicons)
+
+space_words = _lexicons["space_words"]
+security_words = _lexicons["security_words"]
+adversary_words = _lexicons["adversary_words"]
+categories = _lexicons["categories"]  #categorize incoming SpaceFlightNews API records
+exclude = _lexicons["exclude"]
+countries = _lexicons["countries"]
+entities = _lexicons["entities"]
+country_codes = _lexicons["country_codes"]  #country → ISO3 code (dim_country, see sql/dimensions.sql)
+na_phrases = _lexicons["na_phrases"]  #ensures that records with these terms aren't included in list of records
+
+
+def lexicon_version() -> str:
+    """
+    Content hash of the country / entity lexicons in use (stored with every classified record, see lexicon.py).
+    """
+    return _tag_version
+
+def reload_lexicons() -> bool:
+    """
+    Reloads the lexicon files if they changed on disk (one stat per file when they didn't).
+    Call between batches: records of one batch should be classified with one version.
+    Returns True when a new version is now in use; an invalid file is reported and the current lexicons are kept.
+    """
+    global _stamp, _version, _tag_version, _tag_matcher, _country_names
+
+    stamp = lexicon.file_stamp()
+    if stamp == _stamp:
+        return False
+    try:
+        lexicons = lexicon.read_lexicons()
+    except lexicon.LexiconError as e:
+        print(f"Lexicons not reloaded: {e}")
+        return False
+
+    _stamp = stamp
+    version = lexicon.content_hash(lexicons)
+    if version == _version:
+        return False
+
+    for name, value in lexicons.items():
+        current = _lexicons[name]
+        if isinstance(current, dict):
+            current.clear()
+            current.update(value)
+        else:
+            current[:] = value
+    tag_version = lexicon.tag_version(lexicons)
+    print(f"Lexicons reloaded: {_tag_version} → {tag_version}" if tag_version != _tag_version else f"Lexicons reloaded: keywords only, still {tag_version}")
+    _version, _tag_version, _tag_matcher, _country_names = version, tag_version, None, None
+    return True
+
+
+#Categorization / Tagging - Related Functions
+def contains(text: str, keywords: list) -> bool:
+    """
+    Ensures that incoming records include space-security content
+    """
+    if not text:
+        return False
+
+    text = address_text_issues(text)
+
+    words, phrases = keyword_lookup(tuple(keywords))
+    if not text.tokens.isdisjoint(words):
+        return True
+    return phrases is not None and phrases.search(text) is not None
+
+def classify_event(text: str) -> str:
+    """
+    categorizes relevant SpaceFlight records
+    """
+    if not text:
+        return "other"
+
+    text = address_text_issues(text)
+    
+    if any(p in text for p in na_phrases):
+        return "other"
+    
+    for category, keywords in categories.items():
+        for keyword in keywords:
+            if keyword in text:
+                return category
+
+    return "other" 
+def address_text_issues(text: str) -> NormalizedText:
+    """
+    Normalizes record text once; text that is already normalized is passed through untouched.
+    """
+    if isinstance(text, NormalizedText):
+        return text
+    if not text:
+        return NormalizedText("")
+
+    return _normalize_text(text)
+
+@lru_cache(maxsize=4096)
+def _normalize_text(text: str) -> NormalizedText:
+    text = re.sub(r"<[^>]+>", " ", text)       # strip HTML
+    text = re.sub(r"(’s|'s)\b", "", text, flags=re.IGNORECASE)      # remove possessives FIRST
+    text = unicodedata.normalize("NFKD", text)
+    text = text.encode("ascii", "ignore").decode("ascii")
+    text = text.lower()
+
+    return NormalizedText(text)
+    
+_tag_matcher = None
+
+def classify_tags(text: str) -> tuple[list[str], list[str]]:
+    """
+    Tags countries and entities mentioned in the record with a single scan of the text.
+    The matcher is loaded once from the compiled lexicon artifact (compiled here if it is missing or stale).
+    """
+    global _tag_matcher
+    if _tag_matcher is None:
+        _tag_matcher = lexicon.load_tag_matcher(_lexicons, _tag_version)
+
+    tags = _tag_matcher(address_text_issues(text))
+    return tags["countries"], tags["entities"]
+
+def classify_countries(text: str) -> list[str]:
+    """
+    Used for tagging countries mentioned in the record.
+    """
+    return classify_tags(text)[0]
+
+def classify_entity(text: str) -> list[str]:
+    """
+    Used for tagging companies/organizations/institutions in the record.
+    """
+    return classify_tags(text)[1]
+
+_country_names = None
+
+def canonical_country(name: str):
+    """
+    Lexicon country for a country name from another source (ex. GDELT sourcecountry "United States"
+    → "United States of America"), matched on the country names and aliases. None if it isn't in the lexicon.
+    """
+    global _country_names
+    if _country_names is None:
+        names = {}
+        for country, aliases in countries.items():
+            for alias in [country] + aliases:
+                names.setdefault(str(address_text_issues(alias)).strip(), country)
+        _country_names = names
+
+    if not isinstance(name, str) or not name:
+        return None
+    return _country_names.get(str(address_text_issues(name)).strip())
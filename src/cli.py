@@ -0,0 +1,234 @@
+# Command line entry point for the Outer Space Security Project:
+
+#     python src/cli.py classify "Russia tests ASAT missile near US satellite"
+#     python src/cli.py fetch                       (new records → data/raw/<source_api>.pkl, watermarks.json)
+#     python src/cli.py classify --raw data/raw     (→ new run in data/archive)
+#     python src/cli.py load [--run RUN_ID]         (latest archived run, or a space_records.csv; then the fetch's watermarks)
+#     python src/cli.py retag [--all | --untagged]  (default: records classified under an older lexicon version)
+#     python src/cli.py build-lexicons              (lexicons/*.json → compiled matcher, prints the lexicon version)
+#     python src/cli.py headlines [--days 7]      (story clusters → weekly_headlines.csv / space_headlines_period)
+#     python src/cli.py export [--columnar tableau_space_records]
+#     python src/cli.py run-all [--stream]          (same as python src/oss.py; --stream overlaps fetch / classify / load)
+#     python src/cli.py daemon [--once]             (resident scheduler, per-source intervals - see scheduler.py)
+
+# Each subcommand imports only what it needs: classifying one string never loads pandas, requests or psycopg2.
+# Every other subcommand writes a run report to data/runs/ (see metrics.py); the daemon writes one per tick.
+# Cold-start budget for `classify "<text>"`: under 200 ms end to end; measured ~40 ms on top of a bare `python -c pass`.
+
+import argparse
+import json
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+WATERMARKS_FILE = "watermarks.json"  #written by fetch, saved by the next load of an archived run (see cmd_load)
+
+
+def cmd_fetch(args):
+    import oss
+
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    watermarks = {}
+    for source_api, (fetched, new_records, failures) in oss.fetch_sources().items():
+        new_records.to_pickle(out_dir / f"{source_api}.pkl")
+        print(f"{source_api}: {len(new_records)} new records → {out_dir / f'{source_api}.pkl'}")
+        latest = oss.fetch_watermark(source_api, oss.latest_published(fetched, source_api), failures)
+        watermarks[source_api] = None if latest is None else latest.isoformat()
+
+    #the watermarks only move once the records are stored: `load` saves them
+    (out_dir / WATERMARKS_FILE).write_text(json.dumps(watermarks, indent=2))
+
+
+def cmd_classify(args):
+    if args.raw:
+        import pandas as pd
+        import oss
+
+        new_records = {
+            source_api: pd.read_pickle(path)
+            for source_api in oss.source_cols
+            if (path := Path(args.raw) / f"{source_api}.pkl").exists()
+        }
+        oss.append_archive(oss.categorize_sources(new_records, workers=args.workers), args.archive)
+        return
+
+    from classify import address_text_issues, classify_event, classify_tags, contains, security_words
+
+    text = address_text_issues(" ".join(args.text))
+    countries, entities = classify_tags(text)
+
+    print(json.dumps({
+        "event_type": classify_event(text),
+        "is_security_related": contains(text, security_words),
+        "countries": countries,
+        "entities": entities,
+    }))
+
+
+def cmd_load(args):
+    import oss
+
+    if args.input:
+        df = oss.read_records_csv(args.input)
+    else:
+        from archive import latest_run, read_archive
+        df = read_archive(args.archive, run_id=args.run or latest_run(args.archive))
+
+    #the views are materialized: refresh them when the load added records
+    if oss.insert_records(df, batch_size=args.batch_size):
+        oss.refresh_materialized_views()
+
+    #fetch → classify → load: the fetched range is stored now, so the next fetch starts after it
+    watermarks_path = Path(args.raw) / WATERMARKS_FILE
+    if not args.input and watermarks_path.exists():
+        import pandas as pd
+
+        for source_api, latest in json.loads(watermarks_path.read_text()).items():
+            oss.save_watermark(source_api, None if latest is None else pd.Timestamp(latest))
+        watermarks_path.unlink()
+    oss.close_connection()
+
+
+def cmd_retag(args):
+    import oss
+
+    if args.untagged:
+        updated = oss.update_older_records(batch_size=args.batch_size, workers=args.workers)
+    elif args.all:
+        updated = oss.retag_all_records(batch_size=args.batch_size, workers=args.workers)
+    else:
+        updated = oss.retag_stale_records(batch_size=args.batch_size, workers=args.workers)
+    if updated:
+        oss.refresh_materialized_views()
+    oss.close_connection()
+
+
+def cmd_headlines(args):
+    import oss
+
+    oss.update_headlines(days=args.days, threshold=args.threshold)
+    oss.refresh_materialized_views()
+    oss.close_connection()
+
+
+def cmd_export(args):
+    import oss
+
+    options = dict(workers=args.workers, columnar=tuple(args.columnar), columnar_format=args.format)
+    if args.output:
+        oss.export_views_to_excel(args.output, **options)
+    else:
+        oss.export_views_to_excel(**options)
+    oss.close_connection()
+
+
+def cmd_build_lexicons(args):
+    import lexicon
+
+    print(f"Lexicon version {lexicon.build()} → {lexicon.artifact_path()}")
+
+
+def cmd_run_all(args):
+    from scheduler import pipeline_lock
+
+    with pipeline_lock():
+        if args.stream:
+            from streaming import run_streaming
+            run_streaming(batch_size=args.batch_size)
+            return
+
+        import oss
+
+        oss.run_pipeline()
+
+
+def cmd_daemon(args):
+    from scheduler import run_daemon
+
+    run_daemon(sources=args.sources, batch_size=args.batch_size, export=not args.no_export, once=args.once)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="astrawatch", description="AstraWatch space-security news pipeline")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    fetch = commands.add_parser("fetch", help="fetch new records from all sources")
+    fetch.add_argument("--out", default=DATA_DIR / "raw", help="folder for the fetched records")
+    fetch.set_defaults(func=cmd_fetch)
+
+    classify = commands.add_parser("classify", help="classify one text, or the records saved by fetch (--raw)")
+    classify.add_argument("text", nargs="*", help="text to classify")
+    classify.add_argument("--raw", help="folder written by fetch")
+    classify.add_argument("--archive", default=DATA_DIR / "archive", help="archive folder for --raw results")
+    classify.add_argument("--workers", type=int, default=1, help="processes for large --raw batches")
+    classify.set_defaults(func=cmd_classify)
+
+    load = commands.add_parser("load", help="insert an archived run (or a space_records csv) into PostgreSQL")
+    load.add_argument("input", nargs="?", help="space_records csv (default: the archive)")
+    load.add_argument("--archive", default=DATA_DIR / "archive", help="archive folder")
+    load.add_argument("--run", help="archived run id (default: the latest run)")
+    load.add_argument("--raw", default=DATA_DIR / "raw", help="fetch folder whose watermarks.json is saved after the load")
+    load.add_argument("--batch-size", type=int, default=10000)
+    load.set_defaults(func=cmd_load)
+
+    retag = commands.add_parser("retag", help="re-run country / entity tagging on records from older lexicon versions")
+    scope = retag.add_mutually_exclusive_group()
+    scope.add_argument("--all", action="store_true", help="every record, whatever its lexicon version")
+    scope.add_argument("--untagged", action="store_true", help="only records with no countries or entities")
+    retag.add_argument("--batch-size", type=int, default=20000)
+    retag.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    retag.set_defaults(func=cmd_retag)
+
+    headlines = commands.add_parser("headlines", help="cluster archived articles into stories and write the weekly headlines")
+    headlines.add_argument("--days", type=int, default=7, help="headline period")
+    headlines.add_argument("--threshold", type=float, default=None, help="cosine similarity to join a story (default 0.5)")
+    headlines.set_defaults(func=cmd_headlines)
+
+    build_lexicons = commands.add_parser("build-lexicons", help="validate lexicons/ and compile the tag matcher")
+    build_lexicons.set_defaults(func=cmd_build_lexicons)
+
+    export = commands.add_parser("export", help="export the SQL views to Excel for Tableau")
+    export.add_argument("--output", help="workbook path")
+    export.add_argument("--workers", type=int, default=4, help="views read at the same time")
+    export.add_argument("--columnar", nargs="*", default=[], metavar="SHEET",
+                        help="also write these sheets to extracts/ (ex. tableau_space_records)")
+    export.add_argument("--format", choices=["csv", "parquet"], default="csv",
+                        help="extract format")
+    export.set_defaults(func=cmd_export)
+
+    run_all = commands.add_parser("run-all", help="fetch, classify, load and export")
+    run_all.add_argument("--stream", action="store_true",
+                         help="load each source batch by batch while the others are still fetching (bounded memory)")
+    run_all.add_argument("--batch-size", type=int, default=500, help="records per insert with --stream")
+    run_all.set_defaults(func=cmd_run_all)
+
+    daemon = commands.add_parser("daemon", help="keep running: fetch each source on its own schedule")
+    daemon.add_argument("--sources", nargs="+", choices=["spaceflight_news", "gdelt", "google_news"],
+                        help="sources to schedule (default: all)")
+    daemon.add_argument("--batch-size", type=int, default=500, help="records per insert")
+    daemon.add_argument("--no-export", action="store_true", help="skip the Excel export after new inserts")
+    daemon.add_argument("--once", action="store_true", help="run one tick and exit")
+    daemon.set_defaults(func=cmd_daemon)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "classify" and not (args.text or args.raw):
+        build_parser().error("classify needs a text or --raw")
+
+    #classifying one text / building the lexicons records nothing; the daemon writes one report per tick
+    if args.command == "classify" and not args.raw or args.command in ("build-lexicons", "daemon"):
+        args.func(args)
+        return
+
+    import metrics
+
+    with metrics.run(args.command):
+        args.func(args)
+
+
+if __name__ == "__main__":
+    main()
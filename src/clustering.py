@@ -0,0 +1,197 @@
+# Incremental story clustering (replaces the dense N×N cosine matrix of ML_Weekly_Highlights.ipynb):
+
+# Articles are vectorized with a fixed hashing TF-IDF (no vocabulary to refit), then
+#     1. each new article joins the most similar active story when cos(article, story centroid) >= threshold
+#     2. the rest are grouped with each other on a sparse radius-neighbour graph (star clustering:
+#        the oldest unassigned article starts a story and takes its unassigned neighbours)
+# Story ids, centroids and document frequencies are kept in a state file between runs, so a story keeps its
+# story_cluster_id while it stays active, and stories not seen for window_days are dropped.
+
+import os
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn import config_context
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.neighbors import NearestNeighbors
+from sklearn.preprocessing import normalize
+
+STATE_FILE = Path(__file__).resolve().parent.parent / "data" / "story_state.pkl"
+SIM_THRESHOLD = 0.50  #higher = stricter grouping (same default as the notebook)
+WINDOW_DAYS = 30  #stories without new articles for this long are closed
+N_FEATURES = 2 ** 18
+WORKING_MEMORY = 256  #MB per chunk of the neighbour search (bounds memory whatever the window size)
+
+headline_cols = ["story_cluster_id", "published_max", "source", "rep_title", "rep_url", "event_type", "is_security_related", "article_count"]
+
+_vectorizer = HashingVectorizer(n_features=N_FEATURES, stop_words="english", alternate_sign=False, norm=None)
+
+
+def new_state() -> dict:
+    return {
+        "next_id": 0,
+        "n_docs": 0,
+        "doc_freq": np.zeros(N_FEATURES, dtype=np.int64),
+        "story_ids": np.zeros(0, dtype=np.int64),
+        "centroids": sparse.csr_matrix((0, N_FEATURES)),
+        "last_seen": np.zeros(0, dtype="datetime64[ns]"),
+        "assigned": {},  #(source_api, raw_source) → (story_cluster_id, published_date)
+    }
+
+
+def load_state(path=STATE_FILE) -> dict:
+    path = Path(path)
+    if not path.exists():
+        return new_state()
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def save_state(state: dict, path=STATE_FILE):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        pickle.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def _vectors(texts: list, state: dict) -> sparse.csr_matrix:
+    """
+    L2-normalized TF-IDF rows; document frequencies include these texts (smooth idf, as TfidfVectorizer).
+    """
+    tf = _vectorizer.transform(texts).tocsr()
+    state["n_docs"] += tf.shape[0]
+    state["doc_freq"] += np.bincount(tf.indices, minlength=N_FEATURES)
+
+    idf = np.log((1 + state["n_docs"]) / (1 + state["doc_freq"])) + 1
+    return normalize(tf @ sparse.diags(idf))
+
+
+def _expire(state: dict, now: np.datetime64, window_days: int):
+    cutoff = now - np.timedelta64(window_days, "D")
+
+    active = state["last_seen"] >= cutoff
+    state["story_ids"] = state["story_ids"][active]
+    state["centroids"] = state["centroids"][active]
+    state["last_seen"] = state["last_seen"][active]
+    state["assigned"] = {key: value for key, value in state["assigned"].items() if value[1] >= cutoff}
+
+
+def _star_clusters(X: sparse.csr_matrix, threshold: float) -> np.ndarray:
+    """
+    Local cluster number per row: rows in order, each unassigned row starts a cluster with its unassigned
+    neighbours (cosine >= threshold). The neighbour graph is sparse and computed in chunks, never N×N.
+    """
+    with config_context(working_memory=WORKING_MEMORY):
+        graph = NearestNeighbors(radius=1 - threshold, metric="cosine", algorithm="brute").fit(X).radius_neighbors_graph(X)
+    graph = graph.tocsr()
+
+    labels = np.full(X.shape[0], -1)
+    n_clusters = 0
+    for i in range(X.shape[0]):
+        if labels[i] != -1:
+            continue
+        neighbours = graph.indices[graph.indptr[i]:graph.indptr[i + 1]]
+        members = np.append(neighbours[labels[neighbours] == -1], i)
+        labels[members] = n_clusters
+        n_clusters += 1
+    return labels
+
+
+def assign_stories(df: pd.DataFrame, state: dict, threshold: float = SIM_THRESHOLD, window_days: int = WINDOW_DAYS) -> pd.Series:
+    """
+    story_cluster_id for every row of df (archive format: title, summary, published_date, source_api, raw_source).
+    Rows assigned in an earlier run keep their id; only new rows are vectorized and clustered. Updates state.
+    Rows older than the window (or without a date) get -1.
+    """
+    published = pd.to_datetime(df["published_date"], utc=True).dt.tz_localize(None)
+    keys = list(zip(df["source_api"], df["raw_source"].astype(str)))
+
+    now = published.max()
+    if pd.isna(now):
+        return pd.Series(-1, index=df.index, name="story_cluster_id")
+
+    _expire(state, now.to_datetime64(), window_days)
+    in_window = (published >= now - pd.Timedelta(days=window_days)).to_numpy()
+    published = published.to_numpy()
+
+    new_rows = np.array([i for i, key in enumerate(keys) if in_window[i] and key not in state["assigned"]], dtype=np.int64)
+    new_rows = new_rows[np.argsort(published[new_rows], kind="stable")]
+
+    if len(new_rows):
+        texts = (df["title"].fillna("").astype(str) + " " + df["summary"].fillna("").astype(str)).str.strip()
+        X = _vectors(texts.iloc[new_rows].tolist(), state)
+        story = np.full(len(new_rows), -1, dtype=np.int64)
+
+        # 1. join an active story
+        if state["centroids"].shape[0]:
+            index = NearestNeighbors(n_neighbors=1, metric="cosine", algorithm="brute").fit(normalize(state["centroids"]))
+            with config_context(working_memory=WORKING_MEMORY):
+                distance, nearest = index.kneighbors(X)
+            joined = distance[:, 0] <= 1 - threshold
+            story[joined] = state["story_ids"][nearest[joined, 0]]
+
+        # 2. new stories among the rest
+        rest = np.flatnonzero(story == -1)
+        if len(rest):
+            labels = _star_clusters(X[rest], threshold)
+            story[rest] = state["next_id"] + labels
+            state["next_id"] += int(labels.max()) + 1
+
+        _update_centroids(state, story, X, published[new_rows])
+        for row, story_id in zip(new_rows, story):
+            state["assigned"][keys[row]] = (int(story_id), published[row])
+
+    return pd.Series([state["assigned"].get(key, (-1,))[0] for key in keys], index=df.index, name="story_cluster_id")
+
+
+def _update_centroids(state: dict, story: np.ndarray, X: sparse.csr_matrix, published: np.ndarray):
+    """
+    Adds the new vectors to their story's centroid (sum of member vectors) and moves last_seen forward.
+    """
+    ids, members = np.unique(story, return_inverse=True)
+    sums = sparse.csr_matrix((np.ones(len(story)), (members, np.arange(len(story)))), shape=(len(ids), len(story))) @ X
+    latest = np.full(len(ids), np.datetime64(0, "ns"))
+    np.maximum.at(latest, members, published)
+
+    position = {story_id: i for i, story_id in enumerate(state["story_ids"])}
+    existing = np.array([story_id in position for story_id in ids])
+
+    rows = [position[story_id] for story_id in ids[existing]]
+    if rows:
+        update = sparse.csr_matrix((np.ones(len(rows)), (rows, np.arange(len(rows)))), shape=(state["centroids"].shape[0], len(rows)))
+        state["centroids"] = (state["centroids"] + update @ sums[existing]).tocsr()
+        state["last_seen"][rows] = np.maximum(state["last_seen"][rows], latest[existing])
+
+    state["story_ids"] = np.concatenate([state["story_ids"], ids[~existing]])
+    state["centroids"] = sparse.vstack([state["centroids"], sums[~existing]]).tocsr()
+    state["last_seen"] = np.concatenate([state["last_seen"], latest[~existing]])
+
+
+def period_headlines(df: pd.DataFrame, story_ids: pd.Series, days: int = 7) -> pd.DataFrame:
+    """
+    weekly_headlines.csv rows for the last `days` days of df: the most recent article of each story
+    as its headline, with the story's article count in the period (same columns as the notebook).
+    """
+    published = pd.to_datetime(df["published_date"], utc=True)
+    period_end = published.max()
+    in_period = (published >= period_end - pd.Timedelta(days=days)) & (published <= period_end)
+
+    period = df[in_period].assign(published_date=published[in_period], story_cluster_id=story_ids[in_period])
+    #whole rows: groupby().first() would take each column's first non-null value, mixing articles
+    headlines = (
+        period.sort_values("published_date", ascending=False, kind="stable")
+        .drop_duplicates(subset="story_cluster_id")
+    )
+    headlines = headlines.merge(period["story_cluster_id"].value_counts().rename("article_count"),
+                                left_on="story_cluster_id", right_index=True)
+
+    return headlines.rename(columns={
+        "published_date": "published_max",
+        "title": "rep_title",
+        "raw_source": "rep_url"
+    })[headline_cols].sort_values(["article_count", "published_max"], ascending=False).reset_index(drop=True)
@@ -1,4 +1,7 @@
 import os
+import threading
+from contextlib import contextmanager
+
 import psycopg2
 from dotenv import load_dotenv
 
@@ -9,14 +12,68 @@ USER = os.getenv("USER")
 PASSWORD = os.getenv("PASSWORD")
 HOST = os.getenv("HOST")
 PORT = os.getenv("PORT")
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+
+_engine = None
+_lock = threading.Lock()
+
+def _connect():
+    # masks the database connection information properly
+    return psycopg2.connect(
+        dbname=DATABASE,
+        user=USER,
+        password=PASSWORD,
+        host=HOST,
+        port=PORT
+    )
+
+def get_engine():
+    """
+    SQLAlchemy engine for pd.read_sql / to_sql. Its connection pool is the only one in the project:
+    get_connection() hands out raw psycopg2 connections from the same pool.
+    Nothing connects until the first call, so importing this module never needs a database.
+    """
+    global _engine
+    with _lock:
+        if _engine is None:
+            from sqlalchemy import create_engine
+            _engine = create_engine("postgresql+psycopg2://", creator=_connect, pool_size=POOL_SIZE, max_overflow=POOL_SIZE)
+    return _engine
+
+@contextmanager
+def get_connection():
+    """
+    Borrow a psycopg2 connection from the pool; commits on success, rolls back on error, then returns it to the pool.
+    Safe to use from several threads at once (each gets its own connection).
+    """
+    conn = get_engine().raw_connection()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
 
-# masks the database connection information properly
-connection = psycopg2.connect(
-    dbname=DATABASE,
-    user=USER,
-    password=PASSWORD,
-    host=HOST,
-    port=PORT
-)
+@contextmanager
+def get_cursor():
+    """
+    Cursor on a pooled connection (see get_connection).
+    """
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
 
-cursor = connection.cursor()
+def close_pool():
+    """
+    Closes every pooled connection (the next get_connection opens new ones).
+    """
+    global _engine
+    with _lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
@@ -0,0 +1,116 @@
+# Near-duplicate detection at ingest (the same wire story syndicated across outlets and sources):
+
+# Every record gets a 64-bit SimHash of its normalized title + summary (tokens weighted by count).
+# A record within MAX_DISTANCE bits of an earlier record (earlier in the batch, or inserted in the last WINDOW_DAYS)
+# is a near-duplicate of it; the earlier one is its canonical record.
+# Lookups use the pigeonhole rule: fingerprints at most k bits apart agree exactly on at least one of k + 1 bit bands,
+# so each band is one dict lookup instead of a scan over every recent fingerprint.
+
+import hashlib
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from classify import address_text_issues
+
+MAX_DISTANCE = int(os.getenv("NEAR_DUP_DISTANCE", 3))  #Hamming distance (bits out of 64)
+WINDOW_DAYS = int(os.getenv("NEAR_DUP_DAYS", 14))  #how far back inserted records are compared
+#flag (store with canonical_event_id) | collapse (skip duplicates) | off
+#flag is the default: flagged records are in space_records, so the next runs skip them before classification
+#(load_seen_keys) like any stored record; collapsed ones are fetched, classified and archived again every run.
+MODE = os.getenv("NEAR_DUP_MODE", "flag")
+
+_TOKEN = re.compile(r"\w+")
+_BITS = np.arange(64, dtype=np.uint64)
+
+
+@lru_cache(maxsize=65536)
+def _token_hash(token: str) -> int:
+    #stable across runs (unlike hash()), since fingerprints are stored in the database
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+
+
+def simhash(text: str) -> int:
+    """
+    Signed 64-bit SimHash (fits a BIGINT column) of the normalized text; 0 for empty text.
+    """
+    tokens, counts = np.unique(_TOKEN.findall(address_text_issues(text)), return_counts=True)
+    if not len(tokens):
+        return 0
+
+    hashes = np.array([_token_hash(token) for token in tokens], dtype=np.uint64)
+    bits = ((hashes[:, None] >> _BITS) & np.uint64(1)).astype(np.int64)
+    weights = counts @ (2 * bits - 1)
+
+    fingerprint = sum(1 << int(i) for i in np.flatnonzero(weights > 0))
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+def distance(a: int, b: int) -> int:
+    return bin((a ^ b) & ((1 << 64) - 1)).count("1")
+
+
+class SimHashIndex:
+    """
+    Fingerprints → record keys, searchable for fingerprints at most max_distance bits away.
+    """
+
+    def __init__(self, max_distance: int = MAX_DISTANCE):
+        self.max_distance = max_distance
+        width = 64 // (max_distance + 1)
+        self.bands = [(i * width, 64 if i == max_distance else (i + 1) * width) for i in range(max_distance + 1)]
+        self.tables = [{} for _ in self.bands]
+
+    def _band_values(self, fingerprint: int):
+        unsigned = fingerprint & ((1 << 64) - 1)
+        return [(unsigned >> lo) & ((1 << (hi - lo)) - 1) for lo, hi in self.bands]
+
+    def add(self, fingerprint: int, key):
+        for table, value in zip(self.tables, self._band_values(fingerprint)):
+            table.setdefault(value, []).append((fingerprint, key))
+
+    def find(self, fingerprint: int):
+        """
+        Key of the closest indexed fingerprint within max_distance (None if there is none).
+        """
+        best = None
+        for table, value in zip(self.tables, self._band_values(fingerprint)):
+            for candidate, key in table.get(value, ()):
+                d = distance(fingerprint, candidate)
+                if d <= self.max_distance and (best is None or d < best[0]):
+                    best = (d, key)
+        return best[1] if best else None
+
+
+def mark_near_duplicates(df: pd.DataFrame, recent: list = (), max_distance: int = MAX_DISTANCE) -> pd.DataFrame:
+    """
+    Adds simhash, canonical_source_api and canonical_raw_source (None for canonical records) to df.
+    recent: (source_api, raw_source, simhash) of canonical records already stored.
+    Within df, records are compared in published order, so the first copy of a story stays canonical.
+    """
+    index = SimHashIndex(max_distance)
+    for source_api, raw_source, fingerprint in recent:
+        index.add(fingerprint, (source_api, raw_source))
+
+    text = df["title"].fillna("").astype(str) + " " + df["summary"].fillna("").astype(str)
+    fingerprints = [simhash(t) for t in text]
+    canonical = [None] * len(df)
+
+    order = np.argsort(pd.to_datetime(df["published_date"], utc=True).to_numpy(), kind="stable")
+    for i in order:
+        if not text.iloc[i].strip():
+            continue
+        key = index.find(fingerprints[i])
+        if key is None:
+            index.add(fingerprints[i], (df["source_api"].iloc[i], str(df["raw_source"].iloc[i])))
+        else:
+            canonical[i] = key
+
+    return df.assign(
+        simhash=fingerprints,
+        canonical_source_api=[key[0] if key else None for key in canonical],
+        canonical_raw_source=[key[1] if key else None for key in canonical],
+    )
@@ -0,0 +1,271 @@
+# Excel / Tableau extract export for oss.py:
+
+# Views are read concurrently, each on its own pooled connection, and streamed in chunks into a write-only
+# openpyxl workbook, so no view is ever held whole in memory.
+# Every view is fingerprinted in PostgreSQL (row count + hash of its rows) and the fingerprints are kept in a
+# manifest next to the workbook: a sheet whose view has not changed is copied from the previous workbook
+# instead of being queried again. Selected views can also be written as CSV / Parquet files (columnar extracts).
+
+import csv
+import hashlib
+import json
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timezone
+from itertools import islice
+from pathlib import Path
+
+from connection import get_connection
+
+CHUNK_SIZE = 5000
+TIMESTAMPTZ_OID = 1184
+#int[], text[], varchar[], bigint[], json, jsonb
+STR_OIDS = {1007, 1009, 1015, 1016, 114, 3802}
+NUMERIC_OID = 1700
+#Parquet column types by PostgreSQL type oid (bool, int8, int2, int4, float4, float8, numeric, date, timestamp, timestamptz);
+#any other column is written as text
+ARROW_TYPES = {16: "bool", 20: "int64", 21: "int16", 23: "int32", 700: "float", 701: "double", 1700: "double",
+               1082: "date32", 1114: "timestamp[us]", 1184: "timestamp[us]"}
+_DONE = object()
+
+
+class _ColumnarWriter:
+    """
+    Writes rows of one view to <name>.csv or <name>.parquet through a temp file (replaced on close).
+    The Parquet schema comes from the view's column types (type_codes: cursor.description oids), not from the
+    first chunk, so a column that starts with NULLs keeps its type.
+    """
+
+    def __init__(self, path: Path, columns: list, file_format: str, type_codes: list = None):
+        self.path = path
+        self.tmp_path = path.with_name(path.name + ".tmp")
+        self.columns = columns
+        self.file_format = file_format
+
+        if file_format == "csv":
+            self.file = open(self.tmp_path, "w", newline="", encoding="utf-8")
+            self.csv = csv.writer(self.file)
+            self.csv.writerow(columns)
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        type_codes = type_codes or [None] * len(columns)
+        self.schema = pa.schema([(col, pa.type_for_alias(ARROW_TYPES.get(oid, "string"))) for col, oid in zip(columns, type_codes)])
+        self.float_cols = [i for i, oid in enumerate(type_codes) if oid == NUMERIC_OID]  #Decimal values
+        self.str_cols = [i for i, oid in enumerate(type_codes) if oid not in ARROW_TYPES]
+        self.parquet = pq.ParquetWriter(self.tmp_path, self.schema)
+
+    def write(self, rows: list):
+        if self.file_format == "csv":
+            self.csv.writerows(rows)
+            return
+
+        import pyarrow as pa
+
+        columns = [list(values) for values in zip(*rows)] or [[] for _ in self.columns]
+        for i in self.float_cols:
+            columns[i] = [None if v is None else float(v) for v in columns[i]]
+        for i in self.str_cols:
+            columns[i] = [None if v is None or isinstance(v, str) else str(v) for v in columns[i]]
+        self.parquet.write_table(pa.Table.from_arrays(columns, schema=self.schema))
+
+    def close(self):
+        if self.file_format == "csv":
+            self.file.close()
+        else:
+            self.parquet.close()  #an empty view gives a file with the schema and no rows
+
+        os.replace(self.tmp_path, self.path)
+
+
+def put_until_stopped(out: queue.Queue, item, stop: threading.Event):
+    """
+    Blocking put that gives up once stop is set (so reader threads never hang on a full queue).
+    """
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=0.5)
+            return
+        except queue.Full:
+            continue
+    raise RuntimeError("stopped")
+
+
+def _excel_rows(rows: list, tz_cols: list, str_cols: list) -> list:
+    """
+    Timestamps with a time zone converted to naive UTC (same as tz_convert(None)),
+    arrays / json written as text (same as DataFrame.to_excel), since Excel cells hold neither.
+    """
+    if not tz_cols and not str_cols:
+        return rows
+
+    converted = []
+    for row in rows:
+        row = list(row)
+        for i in tz_cols:
+            if row[i] is not None:
+                row[i] = row[i].astimezone(timezone.utc).replace(tzinfo=None)
+        for i in str_cols:
+            if row[i] is not None:
+                row[i] = str(row[i])
+        converted.append(row)
+    return converted
+
+
+def _read_view(view: str, previous: str, out: queue.Queue, stop: threading.Event, chunk_size: int):
+    """
+    Reader thread for one view. Puts (fingerprint, columns, column type oids, changed) on out, then (only if changed)
+    the rows in chunks, then _DONE. Fingerprint and rows come from the same snapshot.
+    """
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ;")
+            cursor.execute(f"SELECT * FROM {view} LIMIT 0;")
+            columns = [col.name for col in cursor.description]
+            type_codes = [col.type_code for col in cursor.description]
+            tz_cols = [i for i, col in enumerate(cursor.description) if col.type_code == TIMESTAMPTZ_OID]
+            str_cols = [i for i, col in enumerate(cursor.description) if col.type_code in STR_OIDS]
+
+            cursor.execute(f"SELECT COUNT(*), SUM(hashtext(t::text)::bigint) FROM {view} t;")
+            fingerprint = hashlib.md5(json.dumps([columns, *map(str, cursor.fetchone())]).encode()).hexdigest()
+            changed = fingerprint != previous
+            put_until_stopped(out, (fingerprint, columns, type_codes, changed), stop)
+
+            if changed:
+                rows = conn.cursor(name="export_view")
+                rows.execute(f"SELECT * FROM {view};")
+                while chunk := rows.fetchmany(chunk_size):
+                    put_until_stopped(out, _excel_rows(chunk, tz_cols, str_cols), stop)
+                rows.close()
+            cursor.close()
+
+        put_until_stopped(out, _DONE, stop)
+    except Exception as e:
+        if not stop.is_set():
+            put_until_stopped(out, e, stop)
+
+
+def get_or_raise(out: queue.Queue):
+    """
+    Next item of a reader queue; an exception put there by the reader thread is raised in the caller.
+    """
+    item = out.get()
+    if isinstance(item, Exception):
+        raise item
+    return item
+
+
+def _chunks(rows, size: int):
+    """
+    Lists of up to size items from an iterator (rows of an unchanged sheet, copied chunk by chunk).
+    """
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def _write_sheet(ws, columns: list, rows, extract: _ColumnarWriter = None) -> int:
+    """
+    Appends the header and every chunk of rows to a write-only sheet (and to its columnar extract, if any).
+    Returns the number of rows written.
+    """
+    ws.append(columns)
+
+    written = 0
+    for chunk in rows:
+        for row in chunk:
+            ws.append(row)
+        if extract:
+            extract.write(chunk)
+        written += len(chunk)
+
+    if extract:
+        extract.close()
+    return written
+
+
+def export_views(views: dict, output_file, workers: int = 4, columnar: tuple = (), columnar_format: str = "csv",
+                 chunk_size: int = CHUNK_SIZE) -> dict:
+    """
+    Export {sheet name: view} to one workbook (sheet names cut to Excel's 31 chars), replacing output_file atomically.
+    Sheets listed in columnar are also written to <output folder>/extracts/<sheet>.<csv|parquet>.
+    Returns {sheet: "updated" | "unchanged"}.
+    """
+    from openpyxl import Workbook, load_workbook
+
+    output_path = Path(output_file)
+    tmp_path = output_path.with_suffix(".tmp.xlsx")
+    manifest_path = output_path.with_suffix(".manifest.json")
+    extract_dir = output_path.parent / "extracts"
+
+    # Ensure folder exists
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if columnar:
+        extract_dir.mkdir(exist_ok=True)
+
+    manifest = {}
+    previous = None
+    if output_path.exists() and manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text())
+        previous = load_workbook(output_path, read_only=True)
+
+    def reusable(sheet: str) -> bool:
+        if previous is None or sheet[:31] not in previous.sheetnames:
+            return False
+        if sheet in columnar:
+            return (extract_dir / f"{sheet}.{columnar_format}").exists()
+        return True
+
+    wb = Workbook(write_only=True)
+    queues = {sheet: queue.Queue(maxsize=4) for sheet in views}
+    stop = threading.Event()
+    status = {}
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            try:
+                #readers start in sheet order, so the sheet being written is always one whose reader is running
+                for sheet, view in views.items():
+                    previous_fingerprint = manifest.get(sheet) if reusable(sheet) else None
+                    pool.submit(_read_view, view, previous_fingerprint, queues[sheet], stop, chunk_size)
+
+                for sheet, view in views.items():
+                    out = queues[sheet]
+                    fingerprint, columns, type_codes, changed = get_or_raise(out)
+
+                    if changed:
+                        rows = iter(lambda: get_or_raise(out), _DONE)
+                    else:
+                        get_or_raise(out)
+                        previous_rows = previous[sheet[:31]].iter_rows(values_only=True)
+                        next(previous_rows)
+                        rows = _chunks(previous_rows, chunk_size)
+
+                    extract = None
+                    if sheet in columnar and changed:
+                        extract = _ColumnarWriter(extract_dir / f"{sheet}.{columnar_format}", columns, columnar_format, type_codes)
+
+                    written = _write_sheet(wb.create_sheet(sheet[:31]), columns, rows, extract)
+                    manifest[sheet] = fingerprint
+                    status[sheet] = "updated" if changed else "unchanged"
+                    print(f"Exporting {view} → {sheet} ({status[sheet]}, {written} rows)")
+            finally:
+                stop.set()
+    finally:
+        if previous is not None:
+            previous.close()
+
+    wb.save(tmp_path)
+
+    # Atomic replace so Tableau never reads a partial file
+    os.replace(tmp_path, output_path)
+
+    tmp_manifest = manifest_path.with_name(manifest_path.name + ".tmp")
+    tmp_manifest.write_text(json.dumps({sheet: manifest[sheet] for sheet in views}, indent=2))
+    os.replace(tmp_manifest, manifest_path)
+
+    return status
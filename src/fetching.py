@@ -0,0 +1,113 @@
+# Shared helpers for the API / RSS fetch functions in oss.py:
+#     - RateLimiter: token bucket shared by all fetch threads of a source
+#     - with_retries: retries a request with jittered exponential backoff
+#     - ordered_results: thread pool results in input order, with a bounded number of requests in flight
+#     - time_windows: a date range cut into aligned hour / day windows (ex. for GDELT startdatetime / enddatetime)
+#     - make_session: keep-alive requests.Session sized for a thread pool, with the source's on-disk
+#       response cache (http_cache.py) and its responses reported to metrics.py
+
+import random
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from http_cache import CacheMiss, CachedSession
+
+
+class RateLimiter:
+    """
+    Token bucket: at most `rate` requests per second across every thread sharing it, bursts up to `burst`.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.waited = 0.0  #seconds threads spent waiting for a token (shows rate limiting in the run report)
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+                self.waited += wait
+
+            time.sleep(wait)
+
+
+def with_retries(func, *args, attempts: int = 3, base_delay: float = 1.0, limiter: RateLimiter = None, **kwargs):
+    """
+    Calls func(*args, **kwargs), retrying failures after 1x, 2x, 4x... base_delay (each +/- 50% jitter).
+    Every attempt waits for a limiter token first. The last failure is raised to the caller.
+    """
+    for attempt in range(attempts):
+        if limiter:
+            limiter.acquire()
+        try:
+            return func(*args, **kwargs)
+        except CacheMiss:
+            raise  #replay mode: retrying can't help
+        except Exception:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(base_delay * 2 ** attempt * random.uniform(0.5, 1.5))
+
+
+def ordered_results(pool, func, items, window: int):
+    """
+    Yields func(item) for every item in input order, with at most `window` calls submitted ahead of the consumer,
+    so a slow consumer never has more than `window` finished pages waiting in memory (unlike pool.map).
+    """
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(func, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def time_windows(start, end, step: timedelta) -> list:
+    """
+    [(window start, window end)] covering [start, end), aligned on whole hours (step under a day) or days,
+    so the same windows (and cache keys) come back on the next run; the last window stops at end.
+    """
+    if step >= timedelta(days=1):
+        current = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    else:
+        current = start.replace(minute=0, second=0, microsecond=0)
+
+    windows = []
+    while current < end:
+        windows.append((current, min(current + step, end)))
+        current += step
+    return windows
+
+
+def make_session(pool_size: int = 10, source: str = None, limiter: RateLimiter = None, accept=None) -> requests.Session:
+    """
+    One requests.Session reused for every page of a source, so connections are kept alive between requests.
+    With a source, GET requests go through its response cache (HTTP_CACHE_MODE) and every network response
+    is counted (with its latency) in the current run's metrics; the limiter is only used for network requests.
+    accept: which 200 responses may be cached (see http_cache.CachedSession).
+    """
+    session = requests.Session() if source is None else CachedSession(source, limiter=limiter, accept=accept)
+    if source:
+        session.hooks["response"].append(metrics.response_hook(source))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
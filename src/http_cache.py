@@ -0,0 +1,249 @@
+# On-disk HTTP response cache shared by the three fetchers (via fetching.make_session):
+
+#     data/http_cache/<source>/<key>.json   url, params, status, ETag / Last-Modified, fetched_at
+#     data/http_cache/<source>/<key>.body   response body, as received
+#     data/http_cache/pinned.json           request inputs of the last recorded run (watermarks, GDELT range end)
+
+# The key is a hash of the URL and its (sorted) query parameters. HTTP_CACHE_MODE picks the behaviour:
+#     cache   (default) responses younger than the source's TTL are reused; older ones are revalidated with
+#             If-None-Match / If-Modified-Since, so an unchanged feed costs a 304 instead of a full download
+#     record  every request goes to the network and its response is stored (ex. to capture a run for replay)
+#     replay  never touches the network: stored responses are served whatever their age, a missing one is an error
+#     off     no cache at all
+# Re-running classification after a lexicon change therefore reuses the last responses, and tests / benchmarks
+# can replay a captured run with no network. Request parameters that depend on the database or the clock (the
+# watermarks, the end of the GDELT range) go through pinned(), so a replay sends the recorded run's requests
+# (same cache keys) whatever the watermarks and the time are now.
+# Every new watermark or GDELT window is a new key, so prune() (run before each fetch) deletes the responses nobody
+# fetched or revalidated for HTTP_CACHE_MAX_AGE seconds; responses stored in record mode (a capture) are kept.
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import metrics
+
+CACHE_DIR = Path(os.getenv("HTTP_CACHE_DIR", Path(__file__).resolve().parent.parent / "data" / "http_cache"))
+MODE = os.getenv("HTTP_CACHE_MODE", "cache")  #cache | record | replay | off
+MODES = ("cache", "record", "replay", "off")
+
+#seconds a response is reused without revalidation (HTTP_CACHE_TTL_<SOURCE> overrides, ex. HTTP_CACHE_TTL_GDELT=600)
+TTL = {
+    "spaceflight_news": 15 * 60,
+    "gdelt": 15 * 60,  #GDELT DOC updates every 15 minutes
+    "google_news": 60 * 60,
+}
+DEFAULT_TTL = 15 * 60
+MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", 7 * 24 * 60 * 60))
+#upper bound per source, applied over TTL and the env overrides (the daemon sets 0: every scheduled fetch revalidates)
+MAX_TTL = {}
+
+PINNED_FILE = "pinned.json"
+_pinned_lock = threading.Lock()
+
+
+class CacheMiss(requests.ConnectionError):
+    """
+    Replay mode asked for a response that was never recorded (handled like a network failure by the fetchers).
+    """
+
+
+def ttl(source: str) -> int:
+    seconds = int(os.getenv(f"HTTP_CACHE_TTL_{source.upper()}", TTL.get(source, DEFAULT_TTL)))
+    return min(seconds, MAX_TTL.get(source, seconds))
+
+
+def cache_key(url: str, params: dict = None) -> str:
+    query = urlencode(sorted((params or {}).items()), doseq=True)
+    return hashlib.sha256(f"{url}?{query}".encode()).hexdigest()[:32]
+
+
+def pinned(name: str, value, mode: str = None, cache_dir=None):
+    """
+    A request input (JSON value, ex. an ISO date string) that changes between runs, pinned to the recorded run:
+    record mode stores value under name, replay mode returns the stored value instead (an error if there is none).
+    Other modes return value as it is.
+    """
+    mode = mode or MODE
+    if mode not in ("record", "replay"):
+        return value
+
+    path = Path(cache_dir or CACHE_DIR) / PINNED_FILE
+    with _pinned_lock:
+        try:
+            values = json.loads(path.read_text())
+        except (FileNotFoundError, ValueError):
+            values = {}
+        if mode == "replay":
+            if name not in values:
+                raise CacheMiss(f"no recorded {name} in {path} (HTTP_CACHE_MODE=replay)")
+            return values[name]
+        values[name] = value
+        path.parent.mkdir(parents=True, exist_ok=True)
+        ResponseCache._write(path, json.dumps(values, indent=2).encode())
+    return value
+
+
+class ResponseCache:
+    """
+    Stored responses of one source. Safe to share between fetch threads (every write is an atomic rename).
+    """
+
+    def __init__(self, source: str, cache_dir=None):
+        self.source = source
+        self.folder = Path(cache_dir or CACHE_DIR) / source
+
+    def load(self, key: str):
+        """
+        (metadata, body) of a stored response, None if there is none.
+        """
+        try:
+            meta = json.loads((self.folder / f"{key}.json").read_text())
+            return meta, (self.folder / f"{key}.body").read_bytes()
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def store(self, key: str, url: str, params: dict, response: requests.Response, recorded: bool = False) -> dict:
+        meta = {
+            "url": url,
+            "params": params or {},
+            "status": response.status_code,
+            "encoding": response.encoding,
+            "headers": {name: response.headers[name] for name in ("Content-Type", "ETag", "Last-Modified") if name in response.headers},
+            "fetched_at": time.time(),
+        }
+        if recorded:
+            meta["recorded"] = True  #part of a capture for replay: never pruned
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self._write(self.folder / f"{key}.body", response.content)
+        self._write(self.folder / f"{key}.json", json.dumps(meta, indent=2).encode())
+        return meta
+
+    def touch(self, key: str, meta: dict):
+        """
+        Restarts a response's TTL after a 304 (not modified).
+        """
+        self._write(self.folder / f"{key}.json", json.dumps({**meta, "fetched_at": time.time()}, indent=2).encode())
+
+    @staticmethod
+    def _write(path: Path, data: bytes):
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+
+def prune(max_age: int = None, cache_dir=None) -> int:
+    """
+    Deletes the stored responses not fetched or revalidated for max_age seconds (default MAX_AGE), except the ones
+    stored in record mode. Only in cache mode (replay reads the stored responses whatever their age).
+    Returns the number of responses deleted.
+    """
+    if MODE != "cache":
+        return 0
+
+    cutoff = time.time() - (MAX_AGE if max_age is None else max_age)
+    deleted = 0
+    for path in Path(cache_dir or CACHE_DIR).glob("*/*"):
+        try:
+            #every store / revalidation rewrites the .json file, so its mtime is the response's last use
+            if path.suffix == ".body" or path.stat().st_mtime >= cutoff:
+                continue
+            if path.suffix == ".json":
+                try:
+                    if json.loads(path.read_text()).get("recorded"):
+                        continue
+                except ValueError:
+                    pass
+                path.with_suffix(".body").unlink(missing_ok=True)
+                deleted += 1
+            path.unlink()  #.json, or a .tmp file left by a crash
+        except FileNotFoundError:
+            continue  #deleted by another process
+    return deleted
+
+
+def cached_response(meta: dict, body: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = meta["status"]
+    response._content = body
+    response.encoding = meta["encoding"]
+    response.headers = CaseInsensitiveDict(meta["headers"])
+    response.url = meta["url"]
+    return response
+
+
+class CachedSession(requests.Session):
+    """
+    requests.Session whose GET requests go through the source's ResponseCache (see HTTP_CACHE_MODE).
+    A limiter (fetching.RateLimiter) is only waited on for requests that actually reach the network.
+    accept: response → bool, checked before a 200 is stored (ex. GDELT sends its errors as a 200 with a text body),
+    so a rejected body is fetched again by the next request instead of being served from the cache.
+    """
+
+    def __init__(self, source: str, mode: str = None, cache_dir=None, limiter=None, accept=None):
+        super().__init__()
+        self.source = source
+        self.accept = accept
+        self.mode = mode or MODE
+        if self.mode not in MODES:
+            raise ValueError(f"HTTP_CACHE_MODE must be one of {MODES}, not {self.mode!r}")
+        self.cache = ResponseCache(source, cache_dir)
+        self.limiter = limiter
+
+    def _network(self, method, url, **kwargs) -> requests.Response:
+        if self.limiter:
+            self.limiter.acquire()
+        start = time.perf_counter()
+        try:
+            return super().request(method, url, **kwargs)
+        except requests.RequestException as e:
+            #no response for the response hook: counted here, with the exception name as its status
+            metrics.observe_request(self.source, time.perf_counter() - start, type(e).__name__)
+            raise
+
+    def request(self, method, url, params=None, headers=None, **kwargs):
+        if method.upper() != "GET" or self.mode == "off":
+            return self._network(method, url, params=params, headers=headers, **kwargs)
+
+        key = cache_key(url, params)
+        stored = self.cache.load(key) if self.mode != "record" else None
+
+        if self.mode == "replay":
+            if stored is None:
+                metrics.observe_cache(self.source, "miss")
+                raise CacheMiss(f"no recorded response for {url} {params or ''} (HTTP_CACHE_MODE=replay)")
+            metrics.observe_cache(self.source, "hit")
+            return cached_response(*stored)
+
+        if stored and time.time() - stored[0]["fetched_at"] < ttl(self.source):
+            metrics.observe_cache(self.source, "hit")
+            return cached_response(*stored)
+
+        #stale: ask the server whether it changed since
+        headers = dict(headers or {})
+        if stored:
+            meta = stored[0]
+            if "ETag" in meta["headers"]:
+                headers["If-None-Match"] = meta["headers"]["ETag"]
+            if "Last-Modified" in meta["headers"]:
+                headers["If-Modified-Since"] = meta["headers"]["Last-Modified"]
+
+        response = self._network(method, url, params=params, headers=headers, **kwargs)
+
+        if response.status_code == 304 and stored:
+            metrics.observe_cache(self.source, "revalidated")
+            self.cache.touch(key, stored[0])
+            return cached_response(*stored)
+
+        metrics.observe_cache(self.source, "miss" if self.mode == "cache" else "recorded")
+        if response.status_code == 200 and (self.accept is None or self.accept(response)):
+            self.cache.store(key, url, params, response, recorded=self.mode == "record")
+        return response
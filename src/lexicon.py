@@ -0,0 +1,125 @@
+# Versioned lexicon files for classify.py (keywords and aliases live in lexicons/, not in the code):
+
+#     lexicons/keywords.json     space_words, security_words, adversary_words (filters / GDELT flags / Google queries)
+#     lexicons/categories.json   categories: event type → keywords (first matching category wins, so order matters)
+#     lexicons/filters.json      exclude (off-topic records), na_phrases (records that are never kept)
+#     lexicons/countries.json    countries: country → aliases, country_codes: country → ISO3 code (dim_country, GPI join)
+#     lexicons/entities.json     entities: company / organization → aliases
+
+# The lexicon version is a hash of the country / entity lexicons (TAG_NAMES, what retag recomputes; not of the
+# files' layout or formatting), stored with every record (space_records.lexicon_version) so a retag only touches
+# records tagged under an older version. Keyword edits don't change it: retag doesn't recompute event types.
+# `python src/cli.py build-lexicons` compiles the country / entity matcher into lexicons/compiled/matcher.pickle;
+# classify.py loads it instead of rebuilding the matcher on every start (and rebuilds it itself when it is stale).
+
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+
+from matcher import matcher_from_spec, matcher_spec
+
+LEXICON_DIR = Path(os.getenv("LEXICON_DIR", Path(__file__).resolve().parent.parent / "lexicons"))
+NAMES = ("space_words", "security_words", "adversary_words", "categories", "exclude", "na_phrases", "countries", "entities", "country_codes")
+TAG_NAMES = ("countries", "entities", "country_codes")  #country_codes: stored with the countries in dim_country
+_DICTS = ("categories", "countries", "entities", "country_codes")
+ARTIFACT_FORMAT = 1
+
+
+class LexiconError(ValueError):
+    """
+    A lexicon file is missing, unreadable or has the wrong shape.
+    """
+
+
+def file_stamp(lexicon_dir=LEXICON_DIR) -> tuple:
+    """
+    (name, mtime, size) of every lexicon file: changes whenever a file is edited, added or removed.
+    """
+    return tuple((path.name, path.stat().st_mtime_ns, path.stat().st_size) for path in sorted(Path(lexicon_dir).glob("*.json")))
+
+
+def read_lexicons(lexicon_dir=LEXICON_DIR) -> dict:
+    """
+    {name: list or dict} for every name in NAMES, merged from the lexicon files.
+    """
+    lexicons = {}
+    for path in sorted(Path(lexicon_dir).glob("*.json")):
+        try:
+            content = json.loads(path.read_text(encoding="utf-8"))
+        except ValueError as e:
+            raise LexiconError(f"{path}: {e}") from None
+        for name, value in content.items():
+            if name in lexicons:
+                raise LexiconError(f"{name} is defined twice (second time in {path})")
+            lexicons[name] = value
+
+    missing = [name for name in NAMES if name not in lexicons]
+    if missing:
+        raise LexiconError(f"no {', '.join(missing)} in {lexicon_dir}")
+    for name in NAMES:
+        if not isinstance(lexicons[name], dict if name in _DICTS else list):
+            raise LexiconError(f"{name} should be a {'dict' if name in _DICTS else 'list'}")
+    return {name: lexicons[name] for name in NAMES}
+
+
+def content_hash(lexicons: dict, names=NAMES) -> str:
+    """
+    First 12 hex digits of the SHA-256 of the lexicons in names (in that order, dict order kept).
+    """
+    data = json.dumps([lexicons[name] for name in names], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:12]
+
+
+def tag_version(lexicons: dict) -> str:
+    """
+    Lexicon version: content hash of the country / entity lexicons (TAG_NAMES).
+    """
+    return content_hash(lexicons, TAG_NAMES)
+
+
+def artifact_path(lexicon_dir=LEXICON_DIR) -> Path:
+    return Path(lexicon_dir) / "compiled" / "matcher.pickle"
+
+
+def write_artifact(lexicons: dict, version: str, lexicon_dir=LEXICON_DIR) -> dict:
+    """
+    Compiles the country / entity matcher spec and stores it with its lexicon version. Returns the spec.
+    """
+    spec = matcher_spec({"countries": lexicons["countries"], "entities": lexicons["entities"]})
+    path = artifact_path(lexicon_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(pickle.dumps({"format": ARTIFACT_FORMAT, "version": version, "spec": spec}, pickle.HIGHEST_PROTOCOL))
+    os.replace(tmp_path, path)
+    return spec
+
+
+def load_tag_matcher(lexicons: dict, version: str, lexicon_dir=LEXICON_DIR):
+    """
+    Country / entity matcher (see matcher.build_matcher) from the compiled artifact when it matches version;
+    otherwise compiled here and stored for the next process (if the folder is writable).
+    """
+    try:
+        artifact = pickle.loads(artifact_path(lexicon_dir).read_bytes())
+        if artifact.get("format") == ARTIFACT_FORMAT and artifact.get("version") == version:
+            return matcher_from_spec(artifact["spec"])
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        pass
+
+    try:
+        spec = write_artifact(lexicons, version, lexicon_dir)
+    except OSError:
+        spec = matcher_spec({"countries": lexicons["countries"], "entities": lexicons["entities"]})
+    return matcher_from_spec(spec)
+
+
+def build(lexicon_dir=LEXICON_DIR) -> str:
+    """
+    Build step: validates the lexicon files and writes the compiled artifact. Returns the lexicon version.
+    """
+    lexicons = read_lexicons(lexicon_dir)
+    version = tag_version(lexicons)
+    write_artifact(lexicons, version, lexicon_dir)
+    return version
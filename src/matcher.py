@@ -0,0 +1,135 @@
+# Compiled keyword matching for the categorization / tagging functions in oss.py.
+
+# Instead of running one re.search per alias (and rebuilding the pattern string every call),
+# every alias is compiled once into a single word-boundary alternation, so a record's text is scanned once.
+
+import re
+from functools import cached_property, lru_cache
+
+_WORD_CHAR = re.compile(r"\w")
+_TOKEN = re.compile(r"\w+")
+
+
+class NormalizedText(str):
+    """
+    Record text that has already been through address_text_issues, so the classifiers never normalize it twice.
+    The token set and word offsets are computed on first use and kept with the text.
+    """
+
+    @cached_property
+    def tokens(self) -> frozenset:
+        return frozenset(_TOKEN.findall(self))
+
+    @cached_property
+    def word_offsets(self) -> tuple:
+        return tuple(m.span() for m in _TOKEN.finditer(self))
+
+
+def _is_boundary(left: str, right: str) -> bool:
+    """
+    True when a regex word boundary (\\b) sits between two adjacent characters.
+    """
+    return bool(_WORD_CHAR.match(left)) != bool(_WORD_CHAR.match(right))
+
+
+def _alternation(aliases) -> str:
+    """
+    Regex alternation of the aliases, factored into a prefix tree ("u(?:k|s)" rather than "uk|us")
+    so the regex engine branches once per character instead of retrying every alias.
+    Longer continuations are tried first, so it returns the longest alias matching at a position.
+    """
+    trie = {}
+    for alias in set(aliases):
+        node = trie
+        for ch in alias:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    return _trie_regex(trie) or "(?!)"
+
+
+def _trie_regex(node: dict) -> str:
+    branches = [re.escape(ch) + _trie_regex(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        return f"(?:{body})?"
+    return body
+
+
+def build_matcher(lexicons: dict):
+    """
+    Compile {group: {key: [aliases]}} (ex. {"countries": countries, "entities": entities}) into one matcher.
+    The returned function scans the (already normalized) text once and returns {group: sorted keys},
+    identical to checking rf"\\b{alias}\\b" for every alias of every key.
+    """
+    return matcher_from_spec(matcher_spec(lexicons))
+
+
+def matcher_spec(lexicons: dict) -> dict:
+    """
+    The pure-data part of build_matcher (pattern source and alias → keys table), so it can be stored
+    in the compiled lexicon artifact (see lexicon.py) and turned back into a matcher without redoing this work.
+    """
+    alias_keys = {}
+    for group, lexicon in lexicons.items():
+        for key, aliases in lexicon.items():
+            for alias in aliases:
+                alias_keys.setdefault(alias, set()).add((group, key))
+
+    # only the longest alias is reported per position, so shorter aliases that also match there
+    # (ex. "us" inside "us space force") are folded into its hits ahead of time
+    hits = {}
+    for alias, keys in alias_keys.items():
+        keys = set(keys)
+        for n in range(1, len(alias)):
+            if alias[:n] in alias_keys and _is_boundary(alias[n - 1], alias[n]):
+                keys |= alias_keys[alias[:n]]
+        hits[alias] = tuple(sorted(keys))
+
+    #lookahead keeps matches zero-width, so overlapping aliases at later positions are still found
+    pattern = rf"\b(?=({_alternation(alias_keys)})\b)" if alias_keys else None
+    return {"pattern": pattern, "hits": hits, "groups": tuple(lexicons)}
+
+
+def matcher_from_spec(spec: dict):
+    pattern = re.compile(spec["pattern"]) if spec["pattern"] else None
+    hits, groups = spec["hits"], spec["groups"]
+
+    def match(text: str) -> dict:
+        found = {group: set() for group in groups}
+        if text and pattern:
+            for m in pattern.finditer(text):
+                for group, key in hits[m.group(1)]:
+                    found[group].add(key)
+        return {group: sorted(keys) for group, keys in found.items()}
+
+    return match
+
+
+@lru_cache(maxsize=None)
+def keyword_lookup(keywords: tuple) -> tuple:
+    """
+    Splits a keyword list into single words (checked against the token set)
+    and phrases like "space warfare" / "dual-use" (checked with one compiled pattern).
+    """
+    words = frozenset(k for k in keywords if _TOKEN.fullmatch(k))
+    phrases = [k for k in keywords if k not in words]
+    pattern = re.compile(rf"\b(?:{_alternation(phrases)})\b") if phrases else None
+    return words, pattern
+
+
+@lru_cache(maxsize=None)
+def word_pattern(keywords: tuple) -> re.Pattern:
+    """
+    Whole-word match on any keyword (same rule as contains), for use on pandas string columns.
+    """
+    return re.compile(rf"\b(?:{_alternation(keywords)})\b")
+
+
+@lru_cache(maxsize=None)
+def substring_pattern(keywords: tuple) -> re.Pattern:
+    """
+    Plain substring match on any keyword (same rule as `any(k in text for k in keywords)`).
+    """
+    return re.compile(_alternation(keywords))
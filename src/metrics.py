@@ -0,0 +1,378 @@
+# Run metrics for the pipeline (replaces reading the print() output after a slow night):
+
+#     with metrics.run("run-all"):            one JSON report per run in data/runs/
+#         with metrics.stage("fetch.gdelt") as s:
+#             ...
+#             s.items_out = len(df)
+#             metrics.drop("already_stored", n)
+#
+#     @metrics.instrumented("load")           same, for a whole function (items in / out taken from the DataFrames)
+
+# Every stage records wall time, items in / out, dropped items per reason and the peak memory of the process
+# (and of its worker processes) when it ended. Stages opened inside a stage (on the same thread) are named after it
+# (categorize.gdelt.filter).
+# HTTP requests are counted per source with their latencies (response hooks on the fetch sessions),
+# along with the source's response cache hits / misses (see http_cache.py).
+# With METRICS_TEXTFILE_DIR set, the last run of each command is also written as a Prometheus textfile
+# (node_exporter textfile collector). Outside a run every hook is a no-op, so worker processes record nothing.
+
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  #Windows
+    resource = None
+
+RUNS_DIR = Path(__file__).resolve().parent.parent / "data" / "runs"
+TEXTFILE_DIR = os.getenv("METRICS_TEXTFILE_DIR")
+RETENTION_DAYS = float(os.getenv("METRICS_RETENTION_DAYS", 30))  #older reports are deleted when a new one is written
+
+_lock = threading.Lock()
+_run = None
+_local = threading.local()  #open stages, per thread (sources can be processed on their own threads)
+
+
+def _stack() -> list:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def peak_memory() -> dict:
+    """
+    Peak resident memory so far, in bytes, of this process and of its (finished) worker processes.
+    """
+    if resource is None:
+        return {}
+    scale = 1 if sys.platform == "darwin" else 1024  #ru_maxrss is in bytes on macOS, KiB on Linux
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+    }
+
+
+class Stage:
+    """
+    One timed step of a run. Set items_in / items_out, call drop() and set_value() while it is open.
+    """
+
+    def __init__(self, name: str, items_in: int = None):
+        self.name = name
+        self.items_in = items_in
+        self.items_out = None
+        self.dropped = {}
+        self.values = {}
+        self.started = time.perf_counter()
+        self.seconds = None
+        self.status = "running"
+        self.memory = {}
+
+    def drop(self, reason: str, count: int):
+        if count:
+            self.dropped[reason] = self.dropped.get(reason, 0) + int(count)
+
+    def set_value(self, key: str, value):
+        self.values[key] = value
+
+    def as_dict(self) -> dict:
+        return {
+            "stage": self.name,
+            "status": self.status,
+            "seconds": round(self.seconds, 4) if self.seconds is not None else None,
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "dropped": self.dropped,
+            "peak_memory_bytes": self.memory,
+            **({"values": self.values} if self.values else {}),
+        }
+
+
+class _Run:
+    def __init__(self, name: str):
+        self.name = name
+        self.run_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{name}-{uuid.uuid4().hex[:6]}"
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.stages = []
+        self.requests = {}  #source → {"latencies": [...], "status": {status: count}, "cache": {result: count}}
+
+    def report(self, status: str) -> dict:
+        return {
+            "run_id": self.run_id,
+            "command": self.name,
+            "status": status,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "seconds": round(time.perf_counter() - self.started, 4),
+            "peak_memory_bytes": peak_memory(),
+            "stages": [stage.as_dict() for stage in self.stages],
+            "http": {source: _latency_summary(stats) for source, stats in sorted(self.requests.items())},
+        }
+
+
+def _latency_summary(stats: dict) -> dict:
+    latencies = sorted(stats["latencies"])
+
+    def quantile(q):
+        return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 4) if latencies else None
+
+    return {
+        "requests": len(latencies),
+        "status": stats["status"],
+        "cache": stats["cache"],
+        "seconds_total": round(sum(latencies), 4),
+        "p50": quantile(0.5),
+        "p95": quantile(0.95),
+        "max": round(latencies[-1], 4) if latencies else None,
+    }
+
+
+@contextmanager
+def run(name: str = "pipeline", report_dir=RUNS_DIR, textfile_dir=TEXTFILE_DIR):
+    """
+    Collects the stages of one command and writes <report_dir>/<run_id>.json when it ends (even on failure).
+    Inside another run this does nothing: the outer run keeps collecting.
+    """
+    global _run
+    with _lock:
+        outer = _run is not None
+        if not outer:
+            _run = _Run(name)
+            _stack().clear()
+    if outer:
+        yield _run
+        return
+
+    status = "failed"
+    try:
+        yield _run
+        status = "ok"
+    finally:
+        with _lock:
+            current, _run = _run, None
+        write_report(current.report(status), report_dir, textfile_dir)
+
+
+@contextmanager
+def stage(name: str, items_in: int = None):
+    """
+    Times the block as one stage of the current run (a throwaway Stage outside a run).
+    """
+    if _run is None:
+        yield Stage(name, items_in)
+        return
+
+    stack = _stack()
+    current = Stage(f"{stack[-1].name}.{name}" if stack else name, items_in)
+    with _lock:
+        _run.stages.append(current)
+    stack.append(current)
+    try:
+        yield current
+        current.status = "ok"
+    except BaseException:
+        current.status = "failed"
+        raise
+    finally:
+        current.seconds = time.perf_counter() - current.started
+        current.memory = peak_memory()
+        stack.remove(current)
+
+
+def _count(value):
+    if hasattr(value, "shape"):
+        return len(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    return None
+
+
+def instrumented(name: str = None):
+    """
+    Decorator: every call runs as a stage (default name: the function's).
+    items_in is the length of a DataFrame first argument, items_out the length of a returned DataFrame
+    or a returned count (ex. insert_records).
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name or func.__name__, _count(args[0]) if args and hasattr(args[0], "shape") else None) as current:
+                result = func(*args, **kwargs)
+                if current.items_out is None:
+                    current.items_out = _count(result)
+                return result
+        return wrapper
+    return decorator
+
+
+def current_stage():
+    """
+    Innermost open stage, or a throwaway Stage outside a run.
+    """
+    stack = _stack()
+    return stack[-1] if _run is not None and stack else Stage("none")
+
+
+def drop(reason: str, count: int):
+    """
+    Counts items removed by the innermost open stage, ex. drop("na_phrases", 12).
+    """
+    current_stage().drop(reason, count)
+
+
+def observe_request(source: str, seconds: float, status):
+    """
+    One HTTP request (thread-safe, so fetch threads can report directly).
+    """
+    if _run is None:
+        return
+    with _lock:
+        stats = _run.requests.setdefault(source, {"latencies": [], "status": {}, "cache": {}})
+        stats["latencies"].append(seconds)
+        stats["status"][str(status)] = stats["status"].get(str(status), 0) + 1
+
+
+def observe_cache(source: str, result: str):
+    """
+    One response cache lookup: hit / revalidated / miss / recorded (see http_cache.py).
+    """
+    if _run is None:
+        return
+    with _lock:
+        stats = _run.requests.setdefault(source, {"latencies": [], "status": {}, "cache": {}})
+        stats["cache"][result] = stats["cache"].get(result, 0) + 1
+
+
+def failed_requests(source: str) -> int:
+    """
+    Requests of a source that failed so far in the current run (error status or no response at all).
+    """
+    if _run is None:
+        return 0
+    with _lock:
+        statuses = _run.requests.get(source, {}).get("status", {})
+        return sum(count for status, count in statuses.items() if (int(status) >= 400 if status.isdigit() else status != "ok"))
+
+
+def response_hook(source: str):
+    """
+    requests response hook (session.hooks["response"] / hooks=) that reports every response of a source.
+    """
+    def hook(response, *args, **kwargs):
+        observe_request(source, response.elapsed.total_seconds(), response.status_code)
+    return hook
+
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(report: dict) -> str:
+    """
+    The report as Prometheus text exposition format (gauges for the last run of the command).
+    A stage that ran several times (ex. one load per command) is summed into one series.
+    """
+    help_texts = {
+        "astrawatch_run_success": "1 if the last run finished without an error",
+        "astrawatch_run_seconds": "Wall time of the last run",
+        "astrawatch_run_timestamp_seconds": "Start of the last run (unix time)",
+        "astrawatch_run_peak_memory_bytes": "Peak resident memory of the run",
+        "astrawatch_stage_seconds": "Wall time per stage",
+        "astrawatch_stage_items_in": "Items entering each stage",
+        "astrawatch_stage_items_out": "Items leaving each stage",
+        "astrawatch_stage_dropped": "Items dropped per stage and reason",
+        "astrawatch_http_requests": "HTTP requests per source and status",
+        "astrawatch_http_request_seconds": "HTTP request latency per source (p50 / p95 / max)",
+        "astrawatch_http_request_seconds_sum": "Total HTTP request time per source",
+        "astrawatch_http_cache": "Response cache lookups per source and result",
+    }
+    samples = {metric: {} for metric in help_texts}
+
+    def add(metric: str, value, **labels):
+        key = tuple(labels.items())
+        samples[metric][key] = samples[metric].get(key, 0) + value
+
+    add("astrawatch_run_success", int(report["status"] == "ok"))
+    add("astrawatch_run_seconds", report["seconds"])
+    add("astrawatch_run_timestamp_seconds", datetime.fromisoformat(report["started_at"]).timestamp())
+    for process, value in report["peak_memory_bytes"].items():
+        add("astrawatch_run_peak_memory_bytes", value, process=process)
+
+    for s in report["stages"]:
+        if s["seconds"] is not None:
+            add("astrawatch_stage_seconds", s["seconds"], stage=s["stage"])
+        for key in ("items_in", "items_out"):
+            if s[key] is not None:
+                add(f"astrawatch_stage_{key}", s[key], stage=s["stage"])
+        for reason, count in s["dropped"].items():
+            add("astrawatch_stage_dropped", count, stage=s["stage"], reason=reason)
+
+    for source, http in report["http"].items():
+        for status, count in http["status"].items():
+            add("astrawatch_http_requests", count, source=source, status=status)
+        for quantile in ("p50", "p95", "max"):
+            if http[quantile] is not None:
+                add("astrawatch_http_request_seconds", http[quantile], source=source, quantile=quantile)
+        add("astrawatch_http_request_seconds_sum", http["seconds_total"], source=source)
+        for result, count in http["cache"].items():
+            add("astrawatch_http_cache", count, source=source, result=result)
+
+    lines = []
+    for metric, series in samples.items():
+        if not series:
+            continue
+        lines += [f"# HELP {metric} {help_texts[metric]}", f"# TYPE {metric} gauge"]
+        for labels, value in series.items():
+            label_text = ",".join(f'{k}="{_label(v)}"' for k, v in (("command", report["command"]), *labels))
+            lines.append(f"{metric}{{{label_text}}} {round(value, 4) if isinstance(value, float) else value}")
+    return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path: Path, text: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(text)
+    os.replace(tmp_path, path)
+
+
+def prune_reports(report_dir=RUNS_DIR, days: float = None) -> int:
+    """
+    Deletes the run reports older than `days` (default RETENTION_DAYS). Returns how many were deleted.
+    """
+    cutoff = time.time() - (RETENTION_DAYS if days is None else days) * 24 * 60 * 60
+    deleted = 0
+    for path in Path(report_dir).glob("*.json"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                deleted += 1
+        except FileNotFoundError:
+            continue
+    return deleted
+
+
+def write_report(report: dict, report_dir=RUNS_DIR, textfile_dir=TEXTFILE_DIR) -> Path:
+    """
+    <report_dir>/<run_id>.json, and <textfile_dir>/astrawatch_<command>.prom when textfile_dir is set.
+    Reports older than RETENTION_DAYS are deleted (the daemon writes one per tick).
+    """
+    path = Path(report_dir) / f"{report['run_id']}.json"
+    _write_atomic(path, json.dumps(report, indent=2, default=str))
+    prune_reports(report_dir)
+
+    if textfile_dir:
+        _write_atomic(Path(textfile_dir) / f"astrawatch_{report['command'].replace('-', '_')}.prom", prometheus_text(report))
+
+    slowest = sorted((s for s in report["stages"] if s["seconds"] is not None and "." not in s["stage"]),
+                     key=lambda s: s["seconds"], reverse=True)[:3]
+    print(f"Run report → {path} ({report['status']}, {report['seconds']:.1f} s; slowest: "
+          + ", ".join(f"{s['stage']} {s['seconds']:.1f} s" for s in slowest) + ")")
+    return path
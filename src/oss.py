@@ -15,268 +15,53 @@
 #     - Tagging records based on countries / institutions / entities mentioned (Germany, ESA, Rocket Lab)
 
 # 3. Integration:
-#     - Deduplicates and integrates new records into space_records.csv file
-#     - Connects csv file to PostgreSQL 'AstraWatch' Database (via .env and connection.py files)
+#     - Deduplicates and appends new records to the partitioned archive (data/archive, see archive.py)
+#     - Inserts new records into the PostgreSQL 'AstraWatch' Database (via .env and connection.py files)
 
 # 4. Machine Learning:
-#     - Google Colab imports space_records.csv file to cluster and suggest key headlines
-#     - ML_Weekly_Highlights.ipynb generates a weekly_headlines.csv file
-#     - PostgreSQL imports csv file and generates view: space_headlines_period
+#     - clustering.py groups archived articles into stories incrementally (stable story ids across runs)
+#     - update_headlines writes weekly_headlines.csv and space_headlines_period after each run with new records
+#     - (ML_Weekly_Highlights.ipynb: the original Colab version of the clustering)
 
 # 5. Analytics / Preparation:
 #     - SQL queries create 10 different SQL views, including space_headlines_period
 #     - Due to Tableau trial limitations, SQL views are consolidated into an Excel file for future Tableau consumption.
 
-import requests
+# Every stage is timed (items in / out, drops per reason, HTTP latencies, peak memory) into a run report
+# in data/runs/ (see metrics.py).
+
 import pandas as pd
 #from sqlalchemy import create_engine
-import time
-import re
-import unicodedata
 import os, shutil
-from datetime import datetime
-from pygooglenews import GoogleNews
-from connection import connection, cursor
+import io
+from datetime import datetime, timedelta, timezone
+from connection import close_pool, get_connection, get_cursor
 from pathlib import Path
-
-#keyword groupings to identify relevant information based on API source
-space_words = ["satellite", "space", "spaceport", "spacecraft", "orbit", "asat", "gnss", "launch", "rocket"]
-
-security_words = ["military", "defense", "defence", "missile", "ballistic", "weaponization", "weaponisation", "space warfare", "deterrence", "counterspace", "cyber", "cyberattack", "jamming", "spoofing", "interference", "hacking", "attack", "threat", "vulnerability", "exploit", "malicious", "investigation", "risk", "dual-use", "kinetic strike"]
-
-adversary_words = ["terrorism", "terrorist", "crime", "criminal", "smuggling", "trafficking", "extremist", "armed group"]
-
-categories = {
-    "security_event": ["attack", "jamming", "spoofing", "counterspace","threat", "interference", "missile", "situational awareness", "reconnaissance", "surveillance", "counterspace"],
-    "launch": ["launch", "launched", "liftoff", "rocket", "deploy", "mission", "flight"],
-    "ground_infrastructure": ["spaceport", "ground station", "launch site", "infrastructure"],
-    "satellite_deployment": ["satellite", "deploy", "deployment", "constellation", "payload"],
-    "policy_or_corporate": ["defense", "legislation", "space policy", "deal", "regulation", "contract", "strategy", "strategic", "review", "program", "plan", "security", "space force"]
-} #categorize incoming SpaceFlightNews API records
-
-record_cols = ["title", "summary", "source", "source_api", "published_date", "event_type", "is_space_related", "is_security_related", "countries", "entities", "raw_source", "time_classified"] #incoming records are structured according to database columns
-
-exclude = ["hubble", "nebula", "galaxy", "exoplanet","astrophysics", "cosmic", "game", "gaming", "casino", "slot", "holiday", "christmas", "santa", "in 2017, our annual celebration", "telescope"]
-
-countries = {
-    "Afghanistan": ["afghanistan", "afghan"],
-    "Albania": ["albania", "albanian"],
-    "Algeria": ["algeria", "algerian"],
-    "Argentina": ["argentina", "argentinian", "conae"],
-    "Armenia": ["armenia", "armenian"],
-    "Australia": ["australia", "australian", "australian space agency", "defence space command"],
-    "Austria": ["austria", "austrian"],
-    "Azerbaijan": ["azerbaijan", "azerbaijani"],
-    "Bahamas": ["bahamas", "bahamian"],
-    "Bahrain": ["bahrain", "bahraini"],
-    "Bangladesh": ["bangladesh", "bangladeshi"],
-    "Belarus": ["belarus", "belarusian"],
-    "Belgium": ["belgium", "belgian"],
-    "Belize": ["belize", "belizean"],
-    "Benin": ["benin", "beninese"],
-    "Bhutan": ["bhutan", "bhutanese"],
-    "Bolivia": ["bolivia", "bolivian"],
-    "Bosnia and Herzegovina": ["bosnia", "bosnian", "herzegovina"],
-    "Brazil": ["brazil", "brazilian", "aeb", "brazilian space agency"],
-    "Brunei": ["brunei", "bruneian"],
-    "Bulgaria": ["bulgaria", "bulgarian"],
-    "Burkina Faso": ["burkina faso"],
-    "Cambodia": ["cambodia", "cambodian"],
-    "Cameroon": ["cameroon", "cameroonian"],
-    "Canada": ["canada", "canadian", "canadian space agency", "csa"],
-    "Central African Republic": ["central african republic"],
-    "Chad": ["chad", "chadian"],
-    "Chile": ["chile", "chilean"],
-    "China": ["china", "chinese", "cnsa", "beijing", "pla", "strategic support force"],
-    "Colombia": ["colombia", "colombian"],
-    "Costa Rica": ["costa rica", "costa rican"],
-    "Croatia": ["croatia", "croatian"],
-    "Cuba": ["cuba", "cuban"],
-    "Cyprus": ["cyprus", "cypriot"],
-    "Czech Republic": ["czech republic", "czech"],
-    "Denmark": ["denmark", "danish"],
-    "Dominican Republic": ["dominican republic", "dominican"],
-    "Ecuador": ["ecuador", "ecuadorian"],
-    "Egypt": ["egypt", "egyptian", "egyptian space agency"],
-    "El Salvador": ["el salvador", "salvadoran"],
-    "Estonia": ["estonia", "estonian"],
-    "Ethiopia": ["ethiopia", "ethiopian"],
-    "Finland": ["finland", "finnish"],
-    "France": ["france", "french", "cnes", "arianegroup", "dga"],
-    "Georgia": ["georgia", "georgian"],
-    "Germany": ["germany", "german", "dlr", "bundeswehr"],
-    "Ghana": ["ghana", "ghanaian"],
-    "Greece": ["greece", "greek"],
-    "Guatemala": ["guatemala", "guatemalan"],
-    "Haiti": ["haiti", "haitian"],
-    "Honduras": ["honduras", "honduran"],
-    "Hungary": ["hungary", "hungarian"],
-    "Iceland": ["iceland", "icelandic"],
-    "India": ["india", "indian", "isro", "indian space research organisation"],
-    "Indonesia": ["indonesia", "indonesian"],
-    "Iran": ["iran", "iranian", "iranian space agency", "irgc"],
-    "Iraq": ["iraq", "iraqi"],
-    "Ireland": ["ireland", "irish"],
-    "Israel": ["israel", "israeli", "israel space agency"],
-    "Italy": ["italy", "italian", "asi", "telespazio"],
-    "Japan": ["japan", "japanese", "jaxa"],
-    "Jordan": ["jordan", "jordanian"],
-    "Kazakhstan": ["kazakhstan", "kazakh", "baikonur"],
-    "Kenya": ["kenya", "kenyan"],
-    "Kuwait": ["kuwait", "kuwaiti"],
-    "Latvia": ["latvia", "latvian"],
-    "Lebanon": ["lebanon", "lebanese"],
-    "Lithuania": ["lithuania", "lithuanian"],
-    "Luxembourg": ["luxembourg", "luxembourgish"],
-    "Malaysia": ["malaysia", "malaysian"],
-    "Maldives": ["maldives"],
-    "Mexico": ["mexico", "mexican", "aem"],
-    "Morocco": ["morocco", "moroccan"],
-    "Netherlands": ["netherlands", "dutch"],
-    "New Zealand": ["new zealand", "new zealander"],
-    "Nigeria": ["nigeria", "nigerian"],
-    "North Korea": ["north korea", "dprk", "jong un", "north korean"],
-    "Norway": ["norway", "norwegian"],
-    "Oman": ["oman", "omani"],
-    "Pakistan": ["pakistan", "pakistani", "suparco"],
-    "Philippines": ["philippines", "philippine"],
-    "Poland": ["poland", "polish"],
-    "Portugal": ["portugal", "portuguese"],
-    "Qatar": ["qatar", "qatari"],
-    "Romania": ["romania", "romanian"],
-    "Russia": ["russia", "russian", "roscosmos", "soyuz"],
-    "Saudi Arabia": ["saudi arabia", "saudi", "ssa"],
-    "Singapore": ["singapore", "singaporean"],
-    "Somalia": ["somalia", "somali"],
-    "South Africa": ["south africa", "south african", "sansa"],
-    "South Korea": ["south korea", "kasa"],
-    "Spain": ["spain", "spanish", "spainsat"],
-    "Sweden": ["sweden", "swedish"],
-    "Switzerland": ["switzerland", "swiss"],
-    "Syria": ["syria", "syrian"],
-    "Taiwan": ["taiwan"],
-    "Thailand": ["thailand", "thai"],
-    "Turkey": ["turkey", "turkish", "turkiye", "türkiye"],
-    "Ukraine": ["ukraine", "ukrainian"],
-    "United Arab Emirates": ["united arab emirates", "uae", "uae space agency"],
-    "United Kingdom": ["united kingdom", "uk", "u.k.", "britain", "british", "uk space agency", "ministry of defence", "mod"],
-    "United States of America": ["united states", "us", "u.s.", "american", "nasa", "darpa", "pentagon", "department of defense", "dod", "space development agency", "sda", "space force", "us space force"],
-    "Venezuela": ["venezuela", "venezuelan"],
-    "Vietnam": ["vietnam", "vietnamese"],
-    "Yemen": ["yemen", "yemeni"]
-}
-
-entities = {
-    "SpaceX": ["spacex", "starlink"],
-    "Blue Origin": ["blue origin"],
-    "United Launch Alliance": ["ula", "united launch alliance"],
-    "Arianespace": ["arianespace"],
-    "Rocket Lab": ["rocket lab"],
-    "Firefly Aerospace": ["firefly aerospace"],
-    "Relativity Space": ["relativity space"],
-    "Stoke Space": ["stoke space"],
-    "Isar Aerospace": ["isar aerospace"],
-    "Avio": ["avio"],
-    "Telesat": ["telesat"],
-    "SES": ["ses"],
-    "Inmarsat": ["inmarsat"],
-    "Iridium": ["iridium"],
-    "Viasat": ["viasat"],
-    "Intelsat": ["intelsat"],
-    "Eutelsat": ["eutelsat"],
-    "OneWeb": ["oneweb"],
-    "Globalstar": ["globalstar"],
-    "Lockheed Martin": ["lockheed martin"],
-    "Northrop Grumman": ["northrop grumman"],
-    "Raytheon": ["raytheon"],
-    "L3Harris": ["l3harris"],
-    "Boeing Defense": ["boeing defense"],
-    "Airbus Defence and Space": ["airbus defence", "airbus defense", "airbus space"],
-    "Thales": ["thales"],
-    "Leonardo": ["leonardo"],
-    "BAE Systems": ["bae systems"],
-    "Rheinmetall": ["rheinmetall"],
-    "Hanwha Aerospace": ["hanwha aerospace"],
-    "Maxar": ["maxar"],
-    "Planet Labs": ["planet labs"],
-    "BlackSky": ["blacksky"],
-    "Capella Space": ["capella space"],
-    "HawkEye 360": ["hawkeye 360"],
-    "Iceye": ["iceye"],
-    "Satellogic": ["satellogic"],
-    "NASA": ["nasa"],
-    "ESA": ["esa", "european space agency", "european", "europe"],
-    "JAXA": ["jaxa"],
-    "ISRO": ["isro"],
-    "Roscosmos": ["roscosmos"],
-    "CNSA": ["cnsa"],
-    "US Space Force": ["u.s. space force", "space force"],
-    "Missile Defense Agency": ["missile defense agency", "mda"],
-    "Amazon": ["amazon", "kuiper"],
-    "NATO": ["nato", "diana"],
-    "Sidus Space": ["sidus", "sidus space"],
-    "York Space Systems": ["york space"],
-    "Muon Space": ["muon space"],
-    "Frontgrade": ["frontgrade"],
-    "DARPA": ["darpa"],
-    "Pentagon": ["pentagon"],
-    "Space Development Agency": ["space development agency", "sda"],
-    "CACI": ["caci"],
-    "Arka": ["arka"],
-    "LeoLabs": ["leolabs"],
-    "Lodestar Space": ["lodestar space"],
-    "Odyssey Space Research": ["odyssey space"],
-    "ACME Space": ["acme space"],
-    "Varda Space": ["varda space"],
-    "Voyager Technologies": ["voyager technologies"],
-    "Other": ["anysignal", "sli", "ascendarc", "ursa major", "max space", "starfighters", "b2space", "kymeta","synspective", "eartheye", "arche orbital", "kratos", "indra group", "exolaunch",  "k2 space" ],
+from matcher import substring_pattern, word_pattern
+from classify import (
+    space_words, security_words, adversary_words, categories, exclude, countries, entities, na_phrases, country_codes,
+    contains, classify_event, address_text_issues, classify_tags, classify_countries, classify_entity, lexicon_version,
+    canonical_country
+)
+from tagging import CHUNK_SIZE, WORKERS, classify_parallel, start_pool, tag_texts
+from fetching import RateLimiter, make_session, ordered_results, time_windows, with_retries
+from exporting import export_views
+from archive import ARCHIVE_DIR, append_archive, read_archive
+from http_cache import pinned, prune
+from dedup import MODE as NEAR_DUP_MODE, WINDOW_DAYS as NEAR_DUP_DAYS, mark_near_duplicates
+import metrics
+from concurrent.futures import ThreadPoolExecutor
+
+#date column and raw_source column for each API source
+source_cols = {
+    "spaceflight_news": ("published_at", "id"),
+    "gdelt": ("seendate", "url"),
+    "google_news": ("published", "url"),
 }
 
-#ensures that records with these terms aren't included in list of records
-na_phrases = [
-"launch investigation","launches investigation","launched investigation","launch probe","launches probe","launched probe","launch inquiry","launches inquiry","launched inquiry","launch campaign","launches campaign","launched campaign","launch initiative","launches initiative","launched initiative","launch program","launches program","launched program","launch new program","launch website","launches website","launched website","launch new website","launch alert system","launches alert system","launched alert system",
-"police launch","police launches","police launched","feds launch","feds launches","feds launched","authorities launch","authorities launched","federal investigation","state investigation","placed on leave","fatal shooting","homicide investigation",
-"safe space program","safe space","launch awareness month","human trafficking awareness","community leaders launch","mayor elect","crime victims services website","attorney general announces launch","un toolkit launches","services website",
-"rocket pharmaceuticals","rocket pharma","rocket mortgage","rocket company","rocket companies","rocket stock","rkt stock","shares rocket","stock rockets","prices rocket","stocks rocket","crypto rocket","memecoin rocket","dogecoin rocket","pepe rocket","shares skyrocket","stock soars","shares surge",
-"houston rockets","rockets vs","rockets face","rocket city","rocket city half marathon","spengler cup","rare strike","80th minute rocket","rocket of a shot","rocket sealed","rocket cancelled out",
-"satellite bar","satellite campus","satellite clinic","satellite location","satellite branch", "satellite store","safe space initiative","personal space","space in your home","storage space","parking space",
-]
-
-
-#Categorization / Tagging - Related Functions
-def contains(text: str, keywords: list) -> bool:
-    """
-    Ensures that incoming records include space-security content
-    """
-    if not text:
-        return False
-
-    text = address_text_issues(text)
-
-    for word in keywords:
-        if re.search(rf"\b{re.escape(word)}\b", text):
-            return True
-    return False
-
-def classify_event(text: str) -> str:
-    """
-    categorizes relevant SpaceFlight records
-    """
-    if not text:
-        return "other"
-
-    text = address_text_issues(text)
-    
-    if any(p in text for p in na_phrases):
-        return "other"
-    
-    for category, keywords in categories.items():
-        for keyword in keywords:
-            if keyword in text:
-                return category
-
-    return "other" 
+record_cols = ["title", "summary", "source", "source_api", "published_date", "event_type", "is_space_related", "is_security_related", "countries", "entities", "raw_source", "time_classified", "lexicon_version", "source_country"] #incoming records are structured according to database columns
 
+#Categorization / Tagging - Related Functions (lexicons and per-record classifiers live in classify.py)
 def standardize_dates(value):
     """
     Standardize all incoming date formats to pd datetime for PostgreSQL.
@@ -286,45 +71,15 @@ def standardize_dates(value):
     except Exception:
         return None
 
-def address_text_issues(text: str) -> str:
-    if not text:
-        return ""
-
-    text = re.sub(r"<[^>]+>", " ", text)       # strip HTML
-    text = re.sub(r"(’s|'s)\b", "", text)      # remove possessives FIRST
-    text = unicodedata.normalize("NFKD", text)
-    text = text.encode("ascii", "ignore").decode("ascii")
-    text = text.lower()
-
-    return text
-    
-def classify_countries(text: str) -> list[str]:
-    """
-    Used for tagging countries mentioned in the record.
-    """
-    text = address_text_issues(text)
-    matches = set()
-
-    for country, keywords in countries.items():
-        for k in keywords:
-            if re.search(rf"\b{re.escape(k)}\b", text):
-                matches.add(country)
-                break
-    return sorted(matches)
-
-def classify_entity(text: str) -> list[str]:
+def standardize_date_column(values: pd.Series) -> pd.Series:
     """
-    Used for tagging companies/organizations/institutions in the record.
+    Column version of standardize_dates: one batch parse, with one-by-one parsing only for values it couldn't read.
     """
-    text = address_text_issues(text)
-    matches = []
-    for entity, keywords in entities.items():
-        for k in keywords:
-            if re.search(rf"\b{re.escape(k)}\b", text):
-                matches.append(entity)
-                break
-    return sorted(set(matches))
-
+    dates = pd.to_datetime(values, utc=True, errors="coerce")
+    retry = dates.isna() & values.notna()
+    if retry.any():
+        dates[retry] = values[retry].map(standardize_dates)
+    return dates
 #Archived Functions (used once, no longer needed)
 # EXCEL_FILE = "GPI_public_release_2025.xlsx"
 
@@ -377,38 +132,72 @@ def classify_entity(text: str) -> list[str]:
 
 #Consolidating Space News - Related Functions
 
-def get_spaceflight_articles(max_records: int = 1000):
+def iter_spaceflight_pages(max_records: int = 1000, published_after=None, workers: int = 5, failures: list = None):
     """
-    Access SpaceFlightNews API Records
+    Access SpaceFlightNews API Records, one page (list of articles) at a time
+    The first page gives the total count, the remaining pages are fetched concurrently over one keep-alive session
+    (at most `workers` pages ahead of the consumer). published_after (datetime or ISO string) asks the API for newer articles only.
+    max_records only caps a first run: with published_after every newer article is fetched (newest first), since the
+    watermark moves to the newest one and anything left out (ex. after a long downtime) would never be requested again.
+    failures: list that gets the offset of every page skipped after its retries (see fetch_watermark).
     """
     url = "https://api.spaceflightnewsapi.net/v4/articles"
-    all_articles = []
-    offset = 0
     limit = 100
 
-    while len(all_articles) < max_records:
-        params = {
-            "limit": limit,
-            "offset": offset,
-            "ordering": "-published_at"
-        }
-
-        response = requests.get(url, params=params, timeout=20)
-
-        if response.status_code != 200:
-            print(f"Error {response.status_code}")
-            break
-
-        data = response.json()
-        results = data.get("results", [])
+    params = {
+        "limit": limit,
+        "ordering": "-published_at"
+    }
+    if published_after is not None:
+        published_after = published_after.isoformat() if hasattr(published_after, "isoformat") else published_after
+    published_after = pinned("spaceflight_news.published_after", published_after)  #the recorded run's watermark in replay
+    if published_after is not None:
+        params["published_at_gt"] = published_after
 
-        if not results:
-            break
+    with make_session(workers, source="spaceflight_news") as session:
 
-        all_articles.extend(results)
-        offset += limit
+        def get_page(offset):
+            response = session.get(url, params={**params, "offset": offset}, timeout=20)
+            response.raise_for_status()
+            return response.json()
 
-    return all_articles[:max_records]
+        def get_results(offset):
+            try:
+                return with_retries(get_page, offset).get("results", [])
+            except Exception as e:
+                print(f"Error (offset {offset}): {e}")
+                if failures is not None:
+                    failures.append(offset)
+                return []
+
+        try:
+            first_page = with_retries(get_page, 0)
+        except Exception as e:
+            print(f"Error {e}")
+            if failures is not None:
+                failures.append(0)
+            return
+
+        total = first_page.get("count") or len(first_page.get("results", []))
+        if published_after is None:
+            total = min(max_records, total)
+        remaining = total
+        yield first_page.get("results", [])[:remaining]
+        remaining -= min(remaining, len(first_page.get("results", [])))
+
+        #a failed page is retried on its own and skipped if it keeps failing, the other pages are kept
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for results in ordered_results(pool, get_results, range(limit, total, limit), workers):
+                if remaining <= 0:
+                    break
+                yield results[:remaining]
+                remaining -= len(results[:remaining])
+
+def get_spaceflight_articles(max_records: int = 1000, published_after=None, workers: int = 5, failures: list = None):
+    """
+    Access SpaceFlightNews API Records (every page of iter_spaceflight_pages in one list)
+    """
+    return [article for page in iter_spaceflight_pages(max_records, published_after, workers, failures) for article in page]
 
 
 def make_spaceflight_df(articles):
@@ -430,34 +219,118 @@ def make_spaceflight_df(articles):
     df["source"] = "Spaceflight News API"
     return df
 
-def get_gdelt_articles(query: str, max_records: int = 200):
-    """
-    Access GDELT API Records
-    """
-    url = "https://api.gdeltproject.org/api/v2/doc/doc"
+GDELT_URL = "https://api.gdeltproject.org/api/v2/doc/doc"
+GDELT_MAX_RECORDS = 250  #most articles the DOC API returns for one request
+GDELT_DAYS = 30  #harvest at most this far back (the API's rolling window is 3 months)
+GDELT_RATE = float(os.getenv("GDELT_RATE", 0.2))  #requests per second, across all harvest threads (the API refuses more than one per 5 s)
+#harvest keywords (GDELT matches whole words / quoted phrases); the space / security flags are computed afterwards
+GDELT_QUERIES = ["satellite", "spacecraft", "spaceport", "orbit", "asat", "gnss", '"space force"', '"rocket launch"', '"space security"']
+GDELT_QUERY = "(" + " OR ".join(GDELT_QUERIES) + ")"  #all of them in one request per window
 
-    params = {
+def _gdelt_params(query: str, max_records: int, **window) -> dict:
+    return {
         "query": query,
         "mode": "artlist",
-        "timespan": "1month",
         "format": "json",
         "maxrecords": max_records,
-        "language": "eng"
+        "language": "eng",
+        **window,
     }
 
-    response = requests.get(url, params=params, timeout=30)
-
-    if response.status_code != 200:
-        print(f"GDELT error {response.status_code}")
-        return []
+def _gdelt_json(response) -> bool:
+    """
+    Whether a GDELT response is JSON (its rate-limit and query errors come as plain text with a 200): only those are cached.
+    """
+    try:
+        response.json()
+    except ValueError:
+        return False
+    return True
 
+def _gdelt_request(session, params: dict) -> list:
+    """
+    One DOC API request; raises on HTTP errors and on the plain-text error messages GDELT sends with a 200.
+    """
+    response = session.get(GDELT_URL, params=params, timeout=30)
+    response.raise_for_status()
     try:
         data = response.json()
     except ValueError:
-        print("GDELT returned non-JSON")
+        raise ValueError(f"GDELT returned non-JSON: {response.text[:100]!r}") from None
+    return data.get("articles", [])
+
+def get_gdelt_articles(query: str, max_records: int = 200, timespan: str = "1month"):
+    """
+    Access GDELT API Records: one query, one request (timespan: how far back to search, ex. 1month, 2h, 90min)
+    """
+    try:
+        with make_session(1, source="gdelt", accept=_gdelt_json) as session:
+            return _gdelt_request(session, _gdelt_params(query, max_records, timespan=timespan))
+    except Exception as e:
+        print(f"GDELT error {e}")
         return []
 
-    return data.get("articles", [])
+def iter_gdelt_pages(start=None, end=None, queries: list = None, workers: int = 4, rate: float = None, failures: list = None):
+    """
+    GDELT harvest, one list of articles per (query, time window) request.
+    [start, end) (default: from the GDELT watermark, at most GDELT_DAYS back, to now) is requested whole when it is
+    at most a day long (a regular run: one request), otherwise cut into UTC day windows; every query × window runs
+    on a thread pool sharing one rate limit. queries: default GDELT_QUERY (every keyword in one request).
+    A window that returns GDELT_MAX_RECORDS articles was cut off, so it is requested again hour by hour.
+    Articles can repeat across queries / windows: dedup by url.
+    failures: list that gets the start of every window whose request failed after its retries (see fetch_watermark).
+    """
+    end = _utc(end or datetime.now(timezone.utc))
+    earliest = end - timedelta(days=GDELT_DAYS)
+    start = start if start is not None else get_watermark("gdelt")
+    start = max(_utc(start), earliest) if start is not None else earliest
+    #replay requests the recorded run's range, not one ending now
+    start, end = map(_utc, pinned("gdelt.range", [start.isoformat(), end.isoformat()]))
+    windows = [(start, end)] if end - start <= timedelta(days=1) else time_windows(start, end, timedelta(days=1))
+
+    limiter = RateLimiter(rate or GDELT_RATE)
+    session = make_session(workers, source="gdelt", limiter=limiter, accept=_gdelt_json)
+
+    def search(task):
+        query, window_start, window_end = task
+        params = _gdelt_params(query, GDELT_MAX_RECORDS, startdatetime=f"{window_start:%Y%m%d%H%M%S}",
+                               enddatetime=f"{window_end:%Y%m%d%H%M%S}")
+        try:
+            return with_retries(_gdelt_request, session, params)
+        except Exception as e:
+            print(f"GDELT error ({query}, {window_start:%Y-%m-%d %H:%M}): {e}")
+            if failures is not None:
+                failures.append(window_start)
+            return []
+
+    tasks = [(query, a, b) for a, b in windows for query in (queries or [GDELT_QUERY])]
+    split = []
+
+    with session, ThreadPoolExecutor(max_workers=workers) as pool:
+        for (query, a, b), articles in zip(tasks, ordered_results(pool, search, tasks, 2 * workers)):
+            yield articles
+            if len(articles) >= GDELT_MAX_RECORDS and b - a > timedelta(hours=1):
+                split += [(query, x, y) for x, y in time_windows(a, b, timedelta(hours=1))]
+
+        yield from ordered_results(pool, search, split, 2 * workers)
+
+    stage = metrics.current_stage()
+    stage.set_value("gdelt_requests", len(tasks) + len(split))
+    stage.set_value("rate_limit_wait_seconds", round(limiter.waited, 3))
+
+def _utc(value) -> datetime:
+    """
+    datetime in UTC (GDELT's startdatetime / enddatetime are UTC); a naive value is taken as UTC.
+    psycopg2 returns the watermark in the session time zone, so it has to be converted before formatting.
+    """
+    value = pd.Timestamp(value)
+    return (value.tz_localize("UTC") if value.tzinfo is None else value.tz_convert("UTC")).to_pydatetime()
+
+def harvest_gdelt_articles(start=None, end=None, queries: list = None, workers: int = 4, rate: float = None, failures: list = None):
+    """
+    Every article of iter_gdelt_pages in one list (repeated urls included, see fetch_sources).
+    """
+    return [article for page in iter_gdelt_pages(start, end, queries, workers, rate, failures) for article in page]
 
 def make_gdelt_df(articles):
     """
@@ -474,285 +347,730 @@ def make_gdelt_df(articles):
     df["source"] = "GDELT DOC 2.0"
     return df
 
-def get_google_articles():
+GOOGLE_RSS_URL = "https://news.google.com/rss/search"
+GOOGLE_RSS_PARAMS = {"ceid": "US:en", "hl": "en", "gl": "US"}
+
+def iter_google_rows(workers: int = 8, rate: float = 6.0):
     """
-    Google Functions (via pygooglenews RSS from github)
+    Google Functions (Google News RSS search, same feed URL as pygooglenews), the rows of one query at a time
+    Queries run on a small thread pool over one cached session, sharing one rate limit (requests per second)
+    across threads; responses served from the cache (see http_cache.py) don't wait for the limiter.
     """
-    gn = GoogleNews(lang="en", country="US")
-    rows = []
-
-    for space_kw in space_words:
-        for risk_kw in (security_words + adversary_words):
-            query = f"{space_kw} {risk_kw}"
-            
-            try:
-                feed = gn.search(query, when="7d")
-                entries = feed.get("entries", [])
-
-                for entry in entries[:5]:
-                    rows.append({
-                        "space_keyword": space_kw,
-                        "risk_keyword": risk_kw,
-                        "query": query,
-                        "title": entry.get("title", ""),
-                        "summary": entry.get("summary", ""),
-                        "url": entry.get("link", ""),
-                        "published": entry.get("published", ""),
-                        "collected_at": datetime.utcnow().isoformat(),
-                        "source": "Google News"
-                    })
-
-                time.sleep(1.5)
-
-            except Exception as e:
-                print("Google News error:", e)
-
-    df = pd.DataFrame(rows)
-    df = df.drop_duplicates(subset="url")
+    import feedparser
+
+    limiter = RateLimiter(rate)
+    session = make_session(workers, source="google_news", limiter=limiter)
+    queries = [(space_kw, risk_kw) for space_kw in space_words for risk_kw in (security_words + adversary_words)]
+
+    def search(keywords):
+        space_kw, risk_kw = keywords
+        query = f"{space_kw} {risk_kw}"
+        rows = []
+
+        def search_feed():
+            response = session.get(GOOGLE_RSS_URL, params={"q": f"{query} when:7d", **GOOGLE_RSS_PARAMS}, timeout=20)
+            response.raise_for_status()
+            return feedparser.parse(response.content)
+
+        try:
+            feed = with_retries(search_feed)
+            entries = feed.get("entries", [])
+
+            for entry in entries[:5]:
+                rows.append({
+                    "space_keyword": space_kw,
+                    "risk_keyword": risk_kw,
+                    "query": query,
+                    "title": entry.get("title", ""),
+                    "summary": entry.get("summary", ""),
+                    "url": entry.get("link", ""),
+                    "published": entry.get("published", ""),
+                    "collected_at": datetime.utcnow().isoformat(),
+                    "source": "Google News"
+                })
+
+        except Exception as e:
+            print("Google News error:", e)
+
+        return rows
+
+    #results come back in query order, so dedup keeps the same first occurrence as a serial run
+    with session, ThreadPoolExecutor(max_workers=workers) as pool:
+        yield from ordered_results(pool, search, queries, 2 * workers)
+
+    metrics.current_stage().set_value("rate_limit_wait_seconds", round(limiter.waited, 3))
+
+def get_google_articles(workers: int = 8, rate: float = 6.0):
+    """
+    Every row of iter_google_rows in one frame, without repeated urls
+    """
+    df = pd.DataFrame([row for rows in iter_google_rows(workers, rate) for row in rows])
+    if not df.empty:
+        df = df.drop_duplicates(subset="url")
     return df
 
-def categorize_records(df: pd.DataFrame, source_api: str) -> pd.DataFrame:
+def _keep(text: pd.Series, mask: pd.Series, reason: str) -> pd.Series:
+    """
+    text where mask is True; the other rows are counted as dropped for `reason` (see metrics.py).
+    """
+    metrics.drop(reason, len(text) - int(mask.sum()))
+    return text[mask]
+
+def classify_frame(df: pd.DataFrame, source_api: str) -> pd.DataFrame:
+    """
+    Categorize and standardize a whole batch of records column by column (no per-row loop).
+    Returns the same records / record_cols schema as the per-record rules.
+    Normalization, filters and classification are timed as separate stages (in this process only:
+    chunks classified on the process pool are timed as a whole by categorize_sources).
+    """
+    if df.empty or source_api not in source_cols:
+        return pd.DataFrame(columns=record_cols)
+
+    date_col, raw_col = source_cols[source_api]
+    df = df.reset_index(drop=True)
+
+    with metrics.stage("normalize", len(df)) as step:
+        if source_api == "gdelt":
+            text = df["title"].map(address_text_issues)
+        else:
+            summary = df["summary"].astype(str) if "summary" in df.columns else ""
+            text = (df["title"].astype(str) + " " + summary).map(address_text_issues)
+        step.items_out = len(text)
+
+    #filters: (GDELT) space keywords in the title, unwanted phrases, then (Spaceflight / Google) space keywords and excluded topics
+    with metrics.stage("filter", len(text)) as step:
+        if source_api == "gdelt":
+            has_space = df["has_space"] if "has_space" in df.columns else pd.Series(False, index=df.index)
+            text = _keep(text, has_space.fillna(False).astype(bool), "no_space_keyword")
+
+        text = _keep(text, ~text.str.contains(substring_pattern(tuple(na_phrases))), "na_phrases")
+        if source_api != "gdelt":
+            text = _keep(text, text.str.contains(word_pattern(tuple(space_words))), "no_space_keyword")
+            text = _keep(text, ~text.str.contains(substring_pattern(tuple(exclude))), "excluded_topic")
+        step.items_out = len(text)
+
+    with metrics.stage("classify", len(text)) as step:
+        #event type: first category (in dictionary order) with a keyword in the text
+        event_type = pd.Series("other", index=text.index)
+        for category, keywords in reversed(categories.items()):
+            event_type[text.str.contains(substring_pattern(tuple(keywords)))] = category
+
+        keep = event_type != "other"
+        text, event_type = _keep(text, keep, "no_event_type"), event_type[keep]
+        if text.empty:
+            step.items_out = 0
+            return pd.DataFrame(columns=record_cols)
+
+        tags = [classify_tags(t) for t in text]
+        step.items_out = len(text)
+
+    rows = df.loc[text.index]
+
+    countries = [c for c, _ in tags]
+    entities = [e for _, e in tags]
+
+    source_countries = [None] * len(rows)
+    if source_api == "gdelt":
+        if "sourcecountry" in rows.columns:
+            #publisher country, under its lexicon name (GDELT writes "United States"); countries outside the lexicon are left out
+            source_countries = rows["sourcecountry"].map(canonical_country).tolist()
+            countries = [sorted(set(c + [sc])) if sc else c for c, sc in zip(countries, source_countries)]
+        summary = [None] * len(rows)
+        is_space = rows["has_space"]
+        is_security = rows["has_security"].astype(bool) | rows["has_adversary"].astype(bool)
+    else:
+        summary = rows["summary"] if "summary" in rows.columns else [None] * len(rows)
+        is_space = True
+        is_security = text.str.contains(word_pattern(tuple(security_words)))
+
+    df_out = pd.DataFrame({
+        "title": rows["title"],
+        "summary": summary,
+        "source": rows["source"],
+        "source_api": source_api,
+        "published_date": standardize_date_column(rows[date_col]),
+        "event_type": event_type,
+        "is_space_related": is_space,
+        "is_security_related": is_security,
+        "countries": countries,
+        "entities": entities,
+        "raw_source": rows[raw_col] if raw_col in rows.columns else [None] * len(rows),
+        "time_classified": [datetime.utcnow()] * len(rows),
+        "lexicon_version": lexicon_version(),
+        "source_country": source_countries,  #stored so retag can add it back (sql/lexicon.sql)
+    }, columns=record_cols)
+
+    return df_out.reset_index(drop=True)
+
+def categorize_records(df: pd.DataFrame, source_api: str, workers: int = 1, chunk_size: int = None) -> pd.DataFrame:
     """
     Categorize and standardize all records by defined columns for database
+    Large batches can be spread over several processes (workers=None uses every core).
     """
-    records = []
-    for _, row in df.iterrows():
-        if source_api == "spaceflight_news":
-
-            text = address_text_issues(f"{row['title']} {row.get('summary','')}")
-            if any(p in text for p in na_phrases):
-                continue
-            
-            if not contains(text, space_words):
-                continue
-
-            if any(a in text for a in exclude):
-                continue
-
-            event_type = classify_event(text)
-            
-            if event_type == "other":
-                continue
-
-            countries = classify_countries(text)
-            entities = classify_entity(text)
-
-            records.append({
-                "title": row["title"],
-                "summary": row.get("summary"),
-                "source": row["source"],
-                "source_api": source_api,
-                "published_date": standardize_dates(row["published_at"]),
-                "event_type": event_type,
-                "is_space_related": True,
-                "is_security_related": contains(text, security_words),
-                "countries": countries,
-                "entities": entities,
-                "raw_source": row.get("id"),
-                "time_classified": datetime.utcnow()
-            })
-        elif source_api == "gdelt":
-            text = address_text_issues(row["title"])
-            if any(p in text for p in na_phrases):
-                continue
-
-            if not row.get("has_space"):
-                continue
-            
-            countries = classify_countries(text)
-            event_type = classify_event(text)
-            if event_type == "other":
-                continue
-
-            entities = classify_entity(text)
-
-            if row.get("sourcecountry"):
-                countries.append(row["sourcecountry"])
-
-            countries = sorted(set(countries))
-
-            records.append({
-                "title": row["title"],
-                "summary": None,
-                "source": row["source"],
-                "source_api": source_api,
-                "published_date": standardize_dates(row["seendate"]),
-                "event_type": event_type,
-                "is_space_related": row["has_space"],
-                "is_security_related": row["has_security"] or row["has_adversary"],
-                "countries": countries,
-                "entities": entities,
-                "raw_source": row["url"],
-                "time_classified": datetime.utcnow()
-            })
-
-        elif source_api == "google_news":
-            text = address_text_issues(f"{row['title']} {row.get('summary','')}")
-            
-            if any(p in text for p in na_phrases):
-                continue
-
-            if not contains(text, space_words):
-                continue
-
-            if any(a in text for a in exclude):
-                continue
-
-            event_type = classify_event(text)
-            if event_type == "other":
-                continue
-
-            countries = classify_countries(text)
-            entities = classify_entity(text)
-
-            records.append({
-                "title": row["title"],
-                "summary": row.get("summary"),
-                "source": row["source"],
-                "source_api": source_api,
-                "published_date": standardize_dates(row["published"]),
-                "event_type": event_type,
-                "is_space_related": True,
-                "is_security_related": contains(text, security_words),
-                "countries": countries,
-                "entities": entities,
-                "raw_source": row["url"],
-                "time_classified": datetime.utcnow()
-            })
-
-    df_out = pd.DataFrame(records, columns=record_cols)
-    return df_out
+    if workers != 1 and len(df) > (chunk_size or CHUNK_SIZE):
+        return classify_parallel(df, source_api, workers, chunk_size)
+    return classify_frame(df, source_api)
 
 #Database Management - Related Functions
-def insert_records(df):
+db_cols = ["published_date", "time_classified", "source_api", "source", "title", "summary", "event_type", "is_space_related", "is_security_related", "countries", "entities", "raw_source", "simhash", "lexicon_version", "source_country"] #space_records columns written by insert_records
+stg_cols = db_cols + ["canonical_source_api", "canonical_raw_source"] #+ near-duplicate links, resolved to canonical_event_id after the merge
+
+def _pg_array(values: list) -> str:
     """
-    Insert records into database for SQL queries
+    TEXT[] literal for COPY, ex. ["United States of America", "NASA"] → {"United States of America","NASA"}
+    """
+    items = ('"' + str(v).replace("\\", "\\\\").replace('"', '\\"') + '"' for v in values)
+    return "{" + ",".join(items) + "}"
+
+def _copy_value(value):
+    if isinstance(value, (list, tuple)):
+        return _pg_array(value)
+    if value is None or pd.isna(value):
+        return None
+    return value
+
+def _csv_field(value) -> str:
+    if value is None:
+        return ""  #unquoted empty field = NULL
+    if isinstance(value, (bool, int, float)):
+        return str(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+def _copy_buffer(df: pd.DataFrame) -> io.StringIO:
+    """
+    CSV batch for COPY: strings are quoted and NULLs left unquoted, so '' and NULL stay distinct.
+    """
+    buffer = io.StringIO()
+    for row_num, row in enumerate(df[stg_cols].itertuples(index=False, name=None)):
+        buffer.write(",".join([str(row_num)] + [_csv_field(_copy_value(v)) for v in row]) + "\n")
+    buffer.seek(0)
+    return buffer
+
+def _mentions_sql(source: str) -> str:
+    """
+    INSERT of one event_mentions row per distinct country / entity of the rows in source
+    (a table, CTE or subquery with event_id, published_date, is_security_related, countries and entities),
+    with the mention's dim_country / dim_entity id.
+    """
+    return f"""
+        INSERT INTO event_mentions (event_id, mention_type, mention_id, dim_id, published_date, is_security_related)
+        SELECT DISTINCT s.event_id, m.mention_type, m.mention_id, m.dim_id, s.published_date, s.is_security_related
+        FROM {source} s
+        CROSS JOIN LATERAL (
+            SELECT 'country' AS mention_type, c.name AS mention_id, d.country_id AS dim_id
+            FROM unnest(s.countries) AS c(name)
+            LEFT JOIN dim_country d ON d.name = c.name
+            UNION ALL
+            SELECT 'entity', e.name, d.entity_id
+            FROM unnest(s.entities) AS e(name)
+            LEFT JOIN dim_entity d ON d.name = e.name
+        ) m
+        WHERE m.mention_id IS NOT NULL
+          AND btrim(m.mention_id) <> ''
+        ON CONFLICT DO NOTHING
     """
-    inserted = 0
 
-    for _, row in df.iterrows():
+def _ids_sql(names: str, dimension: str) -> str:
+    """
+    Sorted INT[] of the dim_country / dim_entity ids (dimension: country / entity) of a TEXT[] of lexicon names.
+    """
+    return f"ARRAY(SELECT d.{dimension}_id FROM dim_{dimension} d WHERE d.name = ANY({names}) ORDER BY 1)"
+
+#latest GPI per country (avoids nulls if some countries miss the global max year), cached on dim_country
+_gpi_sql = """
+    UPDATE dim_country d
+    SET gpi_year = g.year,
+        gpi_rank = g.gpi_rank,
+        gpi_score = g.gpi_score
+    FROM (
+        SELECT DISTINCT ON (iso3) iso3, year, gpi_rank, gpi_score
+        FROM peace_index
+        ORDER BY iso3, year DESC
+    ) g
+    WHERE g.iso3 = d.iso3
+      AND (d.gpi_year, d.gpi_rank, d.gpi_score) IS DISTINCT FROM (g.year, g.gpi_rank, g.gpi_score);
+"""
+
+_dimensions_version = None
+
+def sync_dimensions(force: bool = False):
+    """
+    Upserts the lexicon countries / entities into dim_country / dim_entity (see sql/dimensions.sql), refreshes the
+    countries' latest GPI, then fills the ids of records and mentions stored without them.
+    Runs once per lexicon version (existing rows keep their id, so stored id arrays stay valid).
+    """
+    global _dimensions_version
+    version = lexicon_version()
+    if version == _dimensions_version and not force:
+        return
+
+    from psycopg2.extras import execute_values
+
+    with get_cursor() as cursor:
+        execute_values(cursor, """
+            INSERT INTO dim_country (name, iso3, aliases) VALUES %s
+            ON CONFLICT (name) DO UPDATE
+            SET iso3 = EXCLUDED.iso3, aliases = EXCLUDED.aliases
+            WHERE (dim_country.iso3, dim_country.aliases) IS DISTINCT FROM (EXCLUDED.iso3, EXCLUDED.aliases);
+        """, [(name, country_codes.get(name), aliases) for name, aliases in countries.items()], template="(%s, %s, %s::text[])")
+        execute_values(cursor, """
+            INSERT INTO dim_entity (name, aliases) VALUES %s
+            ON CONFLICT (name) DO UPDATE
+            SET aliases = EXCLUDED.aliases
+            WHERE dim_entity.aliases IS DISTINCT FROM EXCLUDED.aliases;
+        """, list(entities.items()), template="(%s, %s::text[])")
+        cursor.execute(_gpi_sql)
+
+        #records stored before the dimensions (older GDELT rows may hold a country alias, ex. "United States")
+        cursor.execute(f"""
+            UPDATE space_records r
+            SET country_ids = ARRAY(
+                    SELECT DISTINCT d.country_id
+                    FROM unnest(r.countries) AS c(name)
+                    JOIN dim_country d ON d.name = c.name OR lower(c.name) = ANY(d.aliases)
+                    ORDER BY 1
+                ),
+                entity_ids = {_ids_sql("r.entities", "entity")}
+            WHERE r.country_ids IS NULL OR r.entity_ids IS NULL;
+        """)
         cursor.execute("""
-            INSERT INTO space_records (
-                published_date,
-                time_classified,
-                source_api,
-                source,
-                title,
-                summary,
-                event_type,
-                is_space_related,
-                is_security_related,
-                countries,
-                entities,
-                raw_source
+            UPDATE event_mentions m
+            SET dim_id = d.country_id
+            FROM dim_country d
+            WHERE m.mention_type = 'country'
+              AND m.dim_id IS NULL
+              AND (d.name = m.mention_id OR lower(m.mention_id) = ANY(d.aliases));
+        """)
+        cursor.execute("""
+            UPDATE event_mentions m
+            SET dim_id = d.entity_id
+            FROM dim_entity d
+            WHERE m.mention_type = 'entity'
+              AND m.dim_id IS NULL
+              AND d.name = m.mention_id;
+        """)
+
+    _dimensions_version = version
+
+@metrics.instrumented("near_duplicates")
+def _near_duplicates(df: pd.DataFrame, mode: str) -> pd.DataFrame:
+    """
+    Fingerprints df and links near-duplicates to their canonical record (see dedup.py).
+    collapse: near-duplicates are dropped. flag: they are kept, after the canonical records,
+    so every canonical record is already stored when its duplicates are linked.
+    """
+    if mode == "off" or df.empty:
+        return df.assign(simhash=[None] * len(df), canonical_source_api=[None] * len(df), canonical_raw_source=[None] * len(df))
+
+    published = pd.to_datetime(df["published_date"], utc=True).min()
+    df = mark_near_duplicates(df, load_recent_fingerprints(None if pd.isna(published) else published.to_pydatetime()))
+    duplicates = df["canonical_raw_source"].notna()
+    print(f"{duplicates.sum()} near-duplicate records ({mode}).")
+
+    if mode == "collapse":
+        metrics.drop("near_duplicate", duplicates.sum())
+        return df[~duplicates]
+    metrics.current_stage().set_value("flagged", int(duplicates.sum()))
+    return pd.concat([df[~duplicates], df[duplicates]])
+
+@metrics.instrumented("load")
+def insert_records(df, batch_size: int = 10000, near_duplicates: str = None):
+    """
+    Insert records into database for SQL queries
+    Each batch is COPY'd into a temporary staging table, then merged into space_records with one INSERT ... SELECT;
+    the same statement resolves the tags to their dimension ids and writes the new records' event_mentions rows
+    (see sql/mentions.sql and sql/dimensions.sql).
+    near_duplicates: collapse / flag / off (default NEAR_DUP_MODE), see dedup.py.
+    """
+    mode = near_duplicates or NEAR_DUP_MODE
+    sync_dimensions()  #new lexicon names need their ids before the insert
+    if "lexicon_version" not in df.columns:
+        df = df.assign(lexicon_version=None)  #records classified before lexicon versions (old csv / archive files)
+    if "source_country" not in df.columns:
+        df = df.assign(source_country=None)
+    df = _near_duplicates(df, mode)
+
+    inserted = 0
+    cols = ", ".join(db_cols)
+
+    with get_cursor() as cursor:
+        cursor.execute(f"""
+            CREATE TEMP TABLE space_records_stg ON COMMIT DROP AS
+            SELECT 0 AS row_num, {cols}, NULL::text AS canonical_source_api, NULL::text AS canonical_raw_source
+            FROM space_records
+            WITH NO DATA;
+        """)
+
+        for start in range(0, len(df), batch_size):
+            batch = df.iloc[start:start + batch_size]
+            cursor.copy_expert(
+                f"COPY space_records_stg (row_num, {', '.join(stg_cols)}) FROM STDIN WITH (FORMAT csv)",
+                _copy_buffer(batch)
             )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (source_api, raw_source) DO NOTHING
-            RETURNING event_id;
-        """, (
-            row["published_date"],
-            row["time_classified"],
-            row["source_api"],
-            row["source"],
-            row["title"],
-            row["summary"],
-            row["event_type"],
-            row["is_space_related"],
-            row["is_security_related"],
-            row["countries"],   # list → TEXT[]
-            row["entities"],    # list → TEXT[]
-            row["raw_source"]
-        ))
-
-        if cursor.fetchone():
-            inserted += 1
-
-    connection.commit()
+            cursor.execute(f"""
+                WITH new_records AS (
+                    INSERT INTO space_records ({cols}, country_ids, entity_ids)
+                    SELECT {cols}, {_ids_sql("s.countries", "country")}, {_ids_sql("s.entities", "entity")}
+                    FROM space_records_stg s
+                    ORDER BY row_num
+                    ON CONFLICT (source_api, raw_source) DO NOTHING
+                    RETURNING event_id, published_date, is_security_related, countries, entities
+                ), mentions AS ({_mentions_sql("new_records")})
+                SELECT COUNT(*) FROM new_records;
+            """)
+            inserted += cursor.fetchone()[0]
+
+            #flagged near-duplicates: link to the canonical record, and keep them out of event_mentions
+            if batch["canonical_raw_source"].notna().any():
+                cursor.execute("""
+                    WITH flagged AS (
+                        UPDATE space_records r
+                        SET canonical_event_id = c.event_id
+                        FROM space_records_stg s
+                        JOIN space_records c
+                          ON c.source_api = s.canonical_source_api
+                         AND c.raw_source = s.canonical_raw_source
+                        WHERE r.source_api = s.source_api
+                          AND r.raw_source = s.raw_source
+                          AND r.canonical_event_id IS NULL
+                          AND r.event_id <> c.event_id
+                        RETURNING r.event_id
+                    )
+                    DELETE FROM event_mentions m
+                    USING flagged f
+                    WHERE m.event_id = f.event_id;
+                """)
+            cursor.execute("TRUNCATE space_records_stg;")
+
+    metrics.drop("already_stored", len(df) - inserted)
     print(f"Inserted {inserted} new records into space_records.")
+    return inserted
+
+#materialized views behind the v_* views, in refresh (dependency) order - see sql/views.sql and sql/tableau.sql
+materialized_views = [
+    "mv_baseline_filter",
+    "mv_baseline_space_security",
+    "mv_security_events_by_country",
+    "mv_security_events_by_entity",
+    "mv_weekly_country_trends",
+    "mv_weekly_entity_trends",
+    "mv_country_cooccurrence",
+    "mv_entity_cooccurrence",
+    "mv_country_entity_shared",
+    "mv_tableau_space_records",
+    "mv_space_mentions",
+]
+
+@metrics.instrumented("refresh")
+def refresh_materialized_views():
+    """
+    Refreshes the analytics materialized views after new inserts.
+    CONCURRENTLY (via their unique indexes) so Tableau / export reads are never blocked; one commit per view.
+    The countries' latest GPI (dim_country) is refreshed first, in case peace_index was reloaded.
+    """
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(_gpi_sql)
+        conn.commit()
+        for view in materialized_views:
+            cursor.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view};")
+            conn.commit()
+        cursor.close()
+
+    print(f"Refreshed {len(materialized_views)} materialized views.")
 
 def close_connection():
-    cursor.close()
-    connection.close()
+    close_pool()
 
 def count_records():
-    cursor.execute("SELECT COUNT(*) FROM space_records;")
-    return cursor.fetchone()[0]
+    with get_cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM space_records;")
+        return cursor.fetchone()[0]
 
-def update_older_records():
+#Incremental Ingestion - Related Functions (see sql/ingestion.sql)
+def get_watermark(source_api: str):
     """
-    Used only when records were not tagged (must be null)
+    Latest published date already ingested for a source (None on the first run).
     """
-    cursor.execute("""
-        SELECT event_id, title, summary
-        FROM space_records
-        WHERE countries = '{}'
-        AND entities = '{}';
-    """)
-    rows = cursor.fetchall()
+    with get_cursor() as cursor:
+        cursor.execute("SELECT last_published FROM ingestion_state WHERE source_api = %s;", (source_api,))
+        row = cursor.fetchone()
+    return row[0] if row else None
 
-    updated = 0
+def set_watermark(source_api: str, df: pd.DataFrame, failures: list = None):
+    """
+    Moves a source's watermark to the newest published date fetched this run (never backwards).
+    Call after insert_records, so a failed run is fetched again next time.
+    failures: pages / windows the fetch skipped (see fetch_watermark).
+    """
+    save_watermark(source_api, fetch_watermark(source_api, latest_published(df, source_api), failures))
 
-    for event_id, title, summary in rows:
-        text = address_text_issues(f"{title} {summary or ''}")
-        
-        if any(p in text for p in na_phrases):
-            continue
-        countries = classify_countries(text)
-        entities = classify_entity(text)
+def fetch_watermark(source_api: str, latest, failures: list = None):
+    """
+    How far a source's watermark may move after a fetch: latest, unless part of the fetch failed.
+    The next run only asks for newer articles, so a failed part must stay after the watermark:
+    GDELT stops at its oldest failed window (whose start is a date), Spaceflight keeps its watermark
+    (the dates of a failed page are unknown).
+    """
+    if not failures or latest is None:
+        return latest
+    if source_api == "gdelt":
+        return min(pd.Timestamp(latest), pd.Timestamp(min(failures)))
+    return None
 
+def latest_published(df: pd.DataFrame, source_api: str):
+    """
+    Newest published date among fetched records (in the source's own format), None if there is none.
+    """
+    if df.empty:
+        return None
+
+    latest = standardize_date_column(df[source_cols[source_api][0]]).max()
+    return None if pd.isna(latest) else latest
+
+def save_watermark(source_api: str, latest):
+    """
+    set_watermark for an already computed date (None leaves the watermark as it is).
+    """
+    if latest is None:
+        return
+
+    with get_cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO ingestion_state (source_api, last_published, updated_at)
+            VALUES (%s, %s, now())
+            ON CONFLICT (source_api) DO UPDATE
+            SET last_published = GREATEST(ingestion_state.last_published, EXCLUDED.last_published),
+                updated_at = now();
+        """, (source_api, latest.to_pydatetime()))
+
+def load_seen_keys(source_api: str) -> set:
+    """
+    raw_source keys already stored for a source, used to skip known items before categorization.
+    """
+    with get_cursor() as cursor:
+        cursor.execute("SELECT raw_source FROM space_records WHERE source_api = %s;", (source_api,))
+        return {str(row[0]) for row in cursor.fetchall()}
+
+def load_recent_fingerprints(since: datetime = None, days: int = None) -> list:
+    """
+    (source_api, raw_source, simhash) of canonical records published from NEAR_DUP_DAYS before `since` (default now)
+    onwards (see sql/dedup.sql).
+    """
+    with get_cursor() as cursor:
         cursor.execute("""
-            UPDATE space_records
-            SET countries = %s,
-                entities = %s
-            WHERE event_id = %s;
-        """, (countries, entities, event_id))
+            SELECT source_api, raw_source, simhash
+            FROM space_records
+            WHERE canonical_event_id IS NULL
+              AND simhash IS NOT NULL
+              AND published_date >= COALESCE(%s, now()) - %s * INTERVAL '1 day';
+        """, (since, days or NEAR_DUP_DAYS))
+        return cursor.fetchall()
+
+def drop_seen_records(df: pd.DataFrame, source_api: str, seen: set = None) -> pd.DataFrame:
+    """
+    Removes fetched records already in space_records (same source_api + raw_source), before any text processing.
+    """
+    if df.empty:
+        return df
 
-        updated += 1
+    seen = load_seen_keys(source_api) if seen is None else seen
+    raw_col = source_cols[source_api][1]
+    new_records = df[~df[raw_col].astype(str).isin(seen)].copy()
+    metrics.drop("already_stored", len(df) - len(new_records))
 
-    connection.commit()
-    print(f"Retagged {updated} existing records.")
+    print(f"{source_api}: {len(df) - len(new_records)} already stored, {len(new_records)} new")
+    return new_records
 
-def retag_all_records():
+def _update_tags(cursor, updates: list):
+    """
+    Writes (event_id, countries, entities) rows back, with their dimension ids, in one set-based UPDATE,
+    then replaces those records' event_mentions rows (same transaction).
+    """
+    from psycopg2.extras import execute_values
+
+    execute_values(cursor, f"""
+        UPDATE space_records AS r
+        SET countries = v.countries,
+            entities = v.entities,
+            country_ids = {_ids_sql("v.countries", "country")},
+            entity_ids = {_ids_sql("v.entities", "entity")}
+        FROM (VALUES %s) AS v(event_id, countries, entities)
+        WHERE r.event_id = v.event_id;
+    """, updates, template="(%s, %s::text[], %s::text[])", page_size=len(updates))
+
+    event_ids = [row[0] for row in updates]
+    cursor.execute("DELETE FROM event_mentions WHERE event_id = ANY(%s);", (event_ids,))
+    cursor.execute(_mentions_sql("(SELECT * FROM space_records WHERE event_id = ANY(%s) AND canonical_event_id IS NULL)"), (event_ids,))
+
+def _retag_stream(where: str, batch_size: int, workers: int, skip_na_phrases: bool = False, params: tuple = ()) -> tuple[int, int]:
+    """
+    Streams rows through a named (server-side) cursor in batches, retags each batch on the process pool,
+    writes back only rows whose tags changed and commits per batch (progress survives a crash).
+    Every retagged row is stamped with the current lexicon version. Returns (rows checked, rows updated).
+    """
+    sync_dimensions()  #retagged names may be new to dim_country / dim_entity
+    workers = workers or WORKERS
+    chunk_size = max(1, -(-batch_size // workers))
+    checked = updated = 0
+    pool = start_pool(workers)
+
+    with get_connection() as conn:
+        rows = conn.cursor(name="retag_stream", withhold=True)
+        rows.itersize = batch_size
+        cursor = conn.cursor()
+
+        try:
+            rows.execute(f"""
+                SELECT event_id, title, summary, countries, entities, source_api, source_country
+                FROM space_records
+                {where}
+                ORDER BY event_id;
+            """, params or None)
+
+            while True:
+                batch = rows.fetchmany(batch_size)
+                if not batch:
+                    break
+                checked += len(batch)
+
+                texts = [f"{title} {summary or ''}" for _, title, summary, *_ in batch]
+                if skip_na_phrases:
+                    keep = [not any(p in address_text_issues(text) for p in na_phrases) for text in texts]
+                    batch = [row for row, k in zip(batch, keep) if k]
+                    texts = [text for text, k in zip(texts, keep) if k]
+
+                tags = tag_texts(texts, workers, chunk_size, pool)
+                tags = [
+                    (_with_source_country(countries, source_api, source_country, old_countries), entities)
+                    for (_, _, _, old_countries, _, source_api, source_country), (countries, entities) in zip(batch, tags)
+                ]
+                updates = [
+                    (event_id, countries, entities)
+                    for (event_id, _, _, old_countries, old_entities, *_), (countries, entities) in zip(batch, tags)
+                    if (old_countries, old_entities) != (countries, entities)
+                ]
+
+                if updates:
+                    _update_tags(cursor, updates)
+                cursor.execute("UPDATE space_records SET lexicon_version = %s WHERE event_id = ANY(%s) AND lexicon_version IS DISTINCT FROM %s;",
+                               (lexicon_version(), [row[0] for row in batch], lexicon_version()))
+                conn.commit()
+                updated += len(updates)
+        finally:
+            rows.close()
+            cursor.close()
+            if pool is not None:
+                pool.shutdown()
+
+    return checked, updated
+
+def _with_source_country(countries: list, source_api: str, source_country: str, old_countries: list) -> list:
+    """
+    Retagged countries plus, for GDELT, the publisher country (not in the text, see classify_frame).
+    Records stored before source_country existed keep their stored lexicon countries, since one of them is the publisher's.
+    """
+    if source_api != "gdelt":
+        return countries
+    extra = [source_country] if source_country else [c for c in map(canonical_country, old_countries or []) if c]
+    return sorted(set(countries + extra)) if extra else countries
+
+@metrics.instrumented("retag")
+def update_older_records(batch_size: int = 20000, workers: int = None):
+    """
+    Used only when records were not tagged (must be null)
+    Returns the number of records whose tags changed.
+    """
+    checked, updated = _retag_stream("WHERE countries = '{}' AND entities = '{}'", batch_size, workers, skip_na_phrases=True)
+    metrics.current_stage().items_in, metrics.current_stage().items_out = checked, updated
+    print(f"Retagged {updated} existing records ({checked} untagged records checked).")
+    return updated
+
+@metrics.instrumented("retag")
+def retag_all_records(batch_size: int = 20000, workers: int = None):
     """
     Used only when records are mislabeled and requires wiping all tagged records from the database.
+    Rows are streamed in batches and tagged on a process pool (see tagging.py), so memory stays flat.
+    Returns the number of records whose tags changed.
     """
-    cursor.execute("""
-        SELECT event_id, title, summary
-        FROM space_records;
-    """)
-    rows = cursor.fetchall()
+    checked, updated = _retag_stream("", batch_size, workers)
+    metrics.current_stage().items_in, metrics.current_stage().items_out = checked, updated
+    print(f"Retagged {updated} records ({checked} records checked).")
+    return updated
 
-    updated = 0
+@metrics.instrumented("retag")
+def retag_stale_records(batch_size: int = 20000, workers: int = None):
+    """
+    Retags only the records classified under another lexicon version than the current one (or before versions
+    were stored), ex. after editing lexicons/countries.json. Event types are not recomputed.
+    Returns the number of records whose tags changed.
+    """
+    checked, updated = _retag_stream("WHERE lexicon_version IS DISTINCT FROM %s", batch_size, workers, params=(lexicon_version(),))
+    metrics.current_stage().items_in, metrics.current_stage().items_out = checked, updated
+    print(f"Retagged {updated} records ({checked} records from older lexicon versions checked, now {lexicon_version()}).")
+    return updated
 
-    for event_id, title, summary in rows:
-        text = f"{title} {summary or ''}"
-        countries = classify_countries(text)
-        entities = classify_entity(text)
 
-        cursor.execute("""
-            UPDATE space_records
-            SET countries = %s,
-                entities = %s
-            WHERE event_id = %s;
-        """, (countries, entities, event_id))
+#Story Clustering - Related Functions (see clustering.py)
+def write_headlines(headlines: pd.DataFrame, output_file="/Users/rachel/Desktop/DI-Bootcamp/FinalProject/data/weekly_headlines.csv"):
+    """
+    Replaces weekly_headlines.csv and adds the headlines to space_headlines_period
+    (same ON CONFLICT rule as the manual csv import in sql/views.sql).
+    """
+    from psycopg2.extras import execute_values
+    from clustering import headline_cols
 
-        updated += 1
+    output_path = Path(output_file)
+    tmp_path = output_path.with_suffix(".tmp.csv")
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    headlines.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, output_path)
 
-    connection.commit()
-    print(f"Retagged {updated} records.")
+    rows = list(headlines.astype(object).where(headlines.notna(), None).itertuples(index=False, name=None))
+    with get_cursor() as cursor:
+        execute_values(cursor, f"""
+            INSERT INTO space_headlines_period ({", ".join(headline_cols)})
+            VALUES %s
+            ON CONFLICT (rep_title, published_max) DO NOTHING;
+        """, rows)
 
+    print(f"{len(headlines)} headlines written to {output_path} and space_headlines_period")
 
-def export_views_to_excel(output_file="/Users/rachel/Desktop/DI-Bootcamp/FinalProject/data/tableau_data.xlsx"):
+@metrics.instrumented("headlines")
+def update_headlines(days: int = 7, threshold: float = None, archive_dir=ARCHIVE_DIR, state_file=None, output_file=None) -> pd.DataFrame:
     """
-    Export SQL views to a single Excel workbook for Tableau.
-    Writes to a temp file first, then atomically replaces the target file.
+    Assigns archived articles of the last WINDOW_DAYS to stories (only articles not clustered before),
+    then writes the headlines of the last `days` days. Story ids stay stable across runs via the state file.
+    scikit-learn is only imported here, so the other stages never load it.
     """
-    from sqlalchemy import create_engine
-    import pandas as pd
-    from connection import connection
+    from clustering import SIM_THRESHOLD, STATE_FILE, WINDOW_DAYS, assign_stories, load_state, period_headlines, save_state
+
+    state_file = state_file or STATE_FILE
+    state = load_state(state_file)
 
-    engine = create_engine("postgresql+psycopg2://", creator=lambda: connection)
+    df = read_archive(archive_dir, columns=["published_date", "title", "summary", "source", "source_api", "raw_source", "event_type", "is_security_related"],
+                      start=pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=WINDOW_DAYS))
+    df = df[df["title"].fillna("").str.len() > 0].drop_duplicates(subset=["source_api", "raw_source"], keep="last")
 
+    story_ids = assign_stories(df, state, threshold or SIM_THRESHOLD)
+    headlines = period_headlines(df[story_ids >= 0], story_ids[story_ids >= 0], days)
+    if output_file:
+        write_headlines(headlines, output_file)
+    else:
+        write_headlines(headlines)
+
+    save_state(state, state_file)
+    return headlines
+
+@metrics.instrumented("export")
+def export_views_to_excel(output_file="/Users/rachel/Desktop/DI-Bootcamp/FinalProject/data/tableau_data.xlsx",
+                          workers: int = 4, columnar: tuple = (), columnar_format: str = "csv"):
+    """
+    Export SQL views to a single Excel workbook for Tableau.
+    Views are read concurrently and streamed into the workbook; sheets whose view is unchanged since the last export
+    are reused (see exporting.py). columnar ex. ("tableau_space_records",) also writes those views to CSV / Parquet.
+    Writes to a temp file first, then atomically replaces the target file.
+    """
     views = {
         "tableau_space_records": "public.v_tableau_space_records",
         "tableau_space_counts": "public.v_tableau_space_counts",
@@ -769,29 +1087,12 @@ def export_views_to_excel(output_file="/Users/rachel/Desktop/DI-Bootcamp/FinalPr
         "security_by_country_with_gpi": "public.v_security_by_country_with_gpi",
     }
 
-    output_path = Path(output_file)
-    tmp_path = output_path.with_suffix(".tmp.xlsx")
+    status = export_views(views, output_file, workers=workers, columnar=columnar, columnar_format=columnar_format)
+    metrics.current_stage().set_value("sheets_unchanged", sum(s == "unchanged" for s in status.values()))
+    metrics.current_stage().set_value("sheets_updated", sum(s == "updated" for s in status.values()))
 
-    # Ensure folder exists
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-
-    with pd.ExcelWriter(tmp_path, engine="openpyxl") as writer:
-        for sheet, view in views.items():
-            print(f"Exporting {view} → {sheet}")
-
-            df = pd.read_sql(f"SELECT * FROM {view};", engine)
-
-            # Remove timezone info for Excel compatibility
-            for col in df.select_dtypes(include=["datetimetz"]).columns:
-                df[col] = df[col].dt.tz_convert(None)
-
-            # Excel sheet names max 31 chars
-            df.to_excel(writer, sheet_name=sheet[:31], index=False)
-
-    # Atomic replace so Tableau never reads a partial file
-    os.replace(tmp_path, output_path)
-
-    print(f"\nExport reflected here: {output_path}")
+    print(f"\nExport reflected here: {output_file} "
+          f"({sum(s == 'unchanged' for s in status.values())} of {len(status)} sheets unchanged)")
 
 #avoid manually moving /saving Colab-generated downloads to the Project Folder
 def replace_colab_records(filename, dest_dir):
@@ -809,85 +1110,152 @@ def replace_colab_records(filename, dest_dir):
 
     print(f"Updated: {dest}")
 
-#Main Program
-if __name__ == "__main__":
-    print("Fetching SpaceFlight News articles...")
+#Pipeline Stages (also available separately through cli.py)
+def add_gdelt_flags(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    GDELT records have titles only: space / security / adversary keywords are checked on the title before classification
+    (one compiled whole-word pattern per group over the normalized titles, same rule as contains).
+    """
+    if df.empty or "title" not in df.columns:
+        return df
+
+    titles = df["title"].fillna("").astype(str).map(address_text_issues)
+    return df.assign(
+        has_space=titles.str.contains(word_pattern(tuple(space_words))),
+        has_security=titles.str.contains(word_pattern(tuple(security_words))),
+        has_adversary=titles.str.contains(word_pattern(tuple(adversary_words))),
+    )
 
-    articles = get_spaceflight_articles(max_records=1000)
-    df_spaceflight = make_spaceflight_df(articles)
+def prune_http_cache():
+    """
+    Deletes old cached responses (see http_cache.prune) before a fetch.
+    """
+    deleted = prune()
+    if deleted:
+        print(f"HTTP cache: {deleted} old responses deleted")
 
-    print("Fetching GDELT articles...")
-    gdelt_query = "satellite"
+def fetch_sources() -> dict:
+    """
+    Fetch all three sources; returns {source_api: (fetched records, records not yet in the database,
+    pages / windows that failed - see fetch_watermark)}.
+    """
+    failures = {"spaceflight_news": [], "gdelt": [], "google_news": []}
+    prune_http_cache()
 
-    gdelt_articles = get_gdelt_articles(gdelt_query, max_records=200)
-    df_gdelt = make_gdelt_df(gdelt_articles)
-    
-    #Deduplicate and tag GDELT records
-    df_gdelt = df_gdelt.drop_duplicates(subset="url")
-
-    if not df_gdelt.empty and "title" in df_gdelt.columns:
-        has_space = []
-        has_security = []
-        has_adversary = []
-        
-        for title in df_gdelt["title"]:
-            has_space.append(contains(title, space_words))
-            has_security.append(contains(title, security_words))
-            has_adversary.append(contains(title, adversary_words))
-
-        df_gdelt["has_space"] = has_space
-        df_gdelt["has_security"] = has_security
-        df_gdelt["has_adversary"] = has_adversary
+    with metrics.stage("fetch.spaceflight_news") as step:
+        print("Fetching SpaceFlight News articles...")
+
+        #only articles newer than the last run are requested, and stored ones are skipped before classification
+        articles = get_spaceflight_articles(max_records=1000, published_after=get_watermark("spaceflight_news"),
+                                            failures=failures["spaceflight_news"])
+        df_spaceflight_fetched = make_spaceflight_df(articles)
+        df_spaceflight = drop_seen_records(df_spaceflight_fetched, "spaceflight_news")
+        step.items_in, step.items_out = len(df_spaceflight_fetched), len(df_spaceflight)
+
+    with metrics.stage("fetch.gdelt") as step:
+        print("Fetching GDELT articles...")
+
+        #the harvest query over the range since the last run, split when GDELT cuts it off (see iter_gdelt_pages)
+        gdelt_articles = harvest_gdelt_articles(failures=failures["gdelt"])
+        df_gdelt = make_gdelt_df(gdelt_articles)
+
+        #Deduplicate and tag GDELT records
+        if not df_gdelt.empty:
+            df_gdelt = df_gdelt.drop_duplicates(subset="url")
+            metrics.drop("duplicate_url", len(gdelt_articles) - len(df_gdelt))
+        df_gdelt_fetched = df_gdelt
+        df_gdelt = drop_seen_records(df_gdelt, "gdelt")
+
+        df_gdelt = add_gdelt_flags(df_gdelt)
+        step.items_in, step.items_out = len(gdelt_articles), len(df_gdelt)
 
     #pull google rss
-    print("Fetching Google News articles...")
+    with metrics.stage("fetch.google_news") as step:
+        print("Fetching Google News articles...")
 
-    df_google = get_google_articles()
+        df_google_fetched = get_google_articles()
+        df_google = drop_seen_records(df_google_fetched, "google_news")
+        step.items_in, step.items_out = len(df_google_fetched), len(df_google)
 
-    #categorize information from incoming records by columns
-    df_space_events = categorize_records(df_spaceflight, "spaceflight_news")
-    df_gdelt_events = categorize_records(df_gdelt, "gdelt")
-    df_google_events = categorize_records(df_google, "google_news")
+    return {
+        "spaceflight_news": (df_spaceflight_fetched, df_spaceflight, failures["spaceflight_news"]),
+        "gdelt": (df_gdelt_fetched, df_gdelt, failures["gdelt"]),
+        "google_news": (df_google_fetched, df_google, failures["google_news"]),
+    }
 
-    df_events = pd.concat(
-        [df_space_events, df_gdelt_events, df_google_events],
-        ignore_index=True
-    )
-    
-    #consolidate all new records into space_records.csv and replaces the older file.
-    space_csv_update = Path(
-    "/Users/rachel/Desktop/DI-Bootcamp/FinalProject/data/space_records.csv"
-)
-    TMP_PATH = space_csv_update.with_suffix(".tmp.csv")
+def categorize_sources(new_records: dict, workers: int = 1) -> pd.DataFrame:
+    """
+    categorize information from incoming records by columns, all sources in one frame
+    """
+    frames = []
+    with metrics.stage("categorize", sum(len(df) for df in new_records.values())) as step:
+        for source_api, df in new_records.items():
+            with metrics.stage(source_api, len(df)) as source_step:
+                frames.append(categorize_records(df, source_api, workers=workers))
+                source_step.items_out = len(frames[-1])
+
+        df_events = pd.concat(frames, ignore_index=True)
+        step.items_out = len(df_events)
+    return df_events
+
+def read_records_csv(input_file) -> pd.DataFrame:
+    """
+    Reads a space_records.csv (written by runs before the archive existed) back into insert_records format.
+    """
+    from ast import literal_eval
 
-    space_csv_update.parent.mkdir(parents=True, exist_ok=True)
-    
-    df_events.to_csv(TMP_PATH, index=False)
-    os.replace(TMP_PATH, space_csv_update)
+    df = pd.read_csv(input_file, converters={"countries": literal_eval, "entities": literal_eval})
+    df["published_date"] = standardize_date_column(df["published_date"])
+    df["time_classified"] = pd.to_datetime(df["time_classified"])
+    return df
+
+def run_pipeline():
+    """
+    Full run: fetch → categorize → archive (data/archive) → PostgreSQL → story headlines → Excel export for Tableau.
+    Writes a run report to data/runs/ (see metrics.py).
+    """
+    with metrics.run("run-all"):
+        sources = fetch_sources()
 
-    print(f"space_records.csv replaced at: {space_csv_update}")
+        df_events = categorize_sources({source_api: new for source_api, (_, new, _) in sources.items()})
+        with metrics.stage("archive", len(df_events)):
+            append_archive(df_events)
 
-    #insert into PostgreSQL
-    #update_older_records()
-    insert_records(df_events)
-    print("Total new records: ", count_records())
+        #insert into PostgreSQL
+        #update_older_records()
+        inserted = insert_records(df_events)
+        print("Total new records: ", count_records())
 
-    #integrate Colab - generated files
-    # source = Path("/Users/rachel/Desktop/DI-Bootcamp/FinalProject")
+        if inserted:
+            update_headlines()
+            refresh_materialized_views()
 
-    # replace_colab_records(
-    # "ML_Weekly_Highlights.ipynb",
-    # source / "notebooks"
-    # )
+        for source_api, (fetched, _, failures) in sources.items():
+            set_watermark(source_api, fetched, failures)
 
-    # replace_colab_records(
-    # "weekly_headlines.csv",
-    # source / "data"
-    # )
+        #integrate Colab - generated files
+        # source = Path("/Users/rachel/Desktop/DI-Bootcamp/FinalProject")
 
-    #export SQL data into excel for Tableau
-    export_views_to_excel()
+        # replace_colab_records(
+        # "ML_Weekly_Highlights.ipynb",
+        # source / "notebooks"
+        # )
+
+        # replace_colab_records(
+        # "weekly_headlines.csv",
+        # source / "data"
+        # )
+
+        #export SQL data into excel for Tableau
+        export_views_to_excel()
+
+        #print("Retagging all existing records...")
+        # retag_all_records()
+        close_connection()
+
+#Main Program
+if __name__ == "__main__":
+    from scheduler import pipeline_lock
 
-    #print("Retagging all existing records...")
-    # retag_all_records()
-    close_connection()
\ No newline at end of file
+    with pipeline_lock():
+        run_pipeline()
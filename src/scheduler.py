@@ -0,0 +1,192 @@
+# Resident scheduler (python src/cli.py daemon): keeps the pipeline running instead of one cold run-all per update.
+
+#     spaceflight_news   every 5 minutes (only articles newer than the watermark are requested)
+#     gdelt              hourly, harvesting the range since its last successful fetch
+#     google_news        hourly, and never more often than GOOGLE_REQUESTS_PER_HOUR allows (one request per query)
+
+# Each tick streams the sources that are due (see streaming.py) inside one run report. The process stays warm
+# between ticks: compiled lexicons (reloaded when a lexicons/ file changes), the database pool and the HTTP cache
+# are reused, and headlines, the view refresh and the Excel export only run after a tick that inserted something.
+# A tick holds data/pipeline.lock, which run-all also takes, so two pipeline runs never write at the same time.
+# A source that fails (an exception, or nothing fetched and failed requests) is retried after 2x, 4x, 8x...
+# its interval, up to MAX_BACKOFF; the other sources keep their schedule.
+# Intervals can be changed with SCHEDULE_INTERVAL_<SOURCE> (seconds), ex. SCHEDULE_INTERVAL_GDELT=1800.
+
+import math
+import os
+import random
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  #Windows
+    fcntl = None
+
+import metrics
+
+LOCK_FILE = Path(__file__).resolve().parent.parent / "data" / "pipeline.lock"
+INTERVALS = {
+    "spaceflight_news": 5 * 60,
+    "gdelt": 60 * 60,
+    "google_news": 60 * 60,
+}
+GOOGLE_REQUESTS_PER_HOUR = int(os.getenv("GOOGLE_REQUESTS_PER_HOUR", 600))
+MAX_BACKOFF = 6 * 60 * 60
+GDELT_LAG = 30 * 60  #GDELT publishes in 15-minute batches: each harvest goes back this much before the last one
+
+
+class PipelineBusy(RuntimeError):
+    """
+    Another pipeline run holds the lock file.
+    """
+
+
+@contextmanager
+def pipeline_lock(lock_file=LOCK_FILE):
+    """
+    Exclusive lock for one pipeline run (released when the process dies, so a crash never leaves it stuck).
+    Raises PipelineBusy instead of waiting.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    Path(lock_file).parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_file, "a") as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise PipelineBusy(f"another pipeline run holds {lock_file}") from None
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def interval(source_api: str) -> int:
+    seconds = int(os.getenv(f"SCHEDULE_INTERVAL_{source_api.upper()}", INTERVALS[source_api]))
+    if source_api == "google_news":
+        from classify import adversary_words, security_words, space_words
+
+        #one request per (space, risk) query: keep a whole pass within the hourly budget
+        queries = len(space_words) * len(security_words + adversary_words)
+        seconds = max(seconds, math.ceil(queries * 3600 / GOOGLE_REQUESTS_PER_HOUR))
+    return seconds
+
+
+def gdelt_start(last_success: float = None, watermark=None):
+    """
+    Start of the next GDELT harvest: shortly before the last successful one (None: from the GDELT watermark),
+    or the watermark when it is older (it stays at the oldest window that failed, see oss.fetch_watermark).
+    """
+    if last_success is None:
+        return None
+    start = datetime.fromtimestamp(last_success - GDELT_LAG, timezone.utc)
+    return min(start, watermark) if watermark is not None else start
+
+
+class SourceSchedule:
+    """
+    When a source runs next, and its failure count for the backoff.
+    """
+
+    def __init__(self, source_api: str, every: int):
+        self.source_api = source_api
+        self.every = every
+        self.next_run = 0.0  #due at start
+        self.last_success = None
+        self.failures = 0
+
+    def succeeded(self, started: float):
+        self.failures = 0
+        self.last_success = started
+        self.next_run = started + self.every
+
+    def failed(self, started: float) -> float:
+        self.failures += 1
+        delay = min(self.every * 2 ** self.failures, MAX_BACKOFF) * random.uniform(0.9, 1.1)
+        self.next_run = started + delay
+        return delay
+
+
+def run_tick(schedules: list, batch_size: int = None, export: bool = True) -> int:
+    """
+    One scheduler tick for the due sources (already under the pipeline lock). Returns the number of inserted records.
+    """
+    import classify
+    import oss
+    import streaming
+
+    classify.reload_lexicons()  #edited lexicons/ files apply from this tick on, without a restart
+    started = time.time()
+    sources = dict.fromkeys(schedule.source_api for schedule in schedules)
+    gdelt = next((schedule for schedule in schedules if schedule.source_api == "gdelt"), None)
+
+    with metrics.run("daemon-tick"):
+        inserted, results = streaming.load_sources(sources, batch_size or streaming.BATCH_SIZE,
+                                                   gdelt_start=gdelt_start(gdelt.last_success, oss.get_watermark("gdelt")) if gdelt else None)
+
+        for schedule in schedules:
+            result = results.get(schedule.source_api)
+            if isinstance(result, Exception) or (not result and metrics.failed_requests(schedule.source_api)):
+                delay = schedule.failed(started)
+                print(f"{schedule.source_api}: failed {schedule.failures}x, next try in {delay / 60:.0f} min")
+            else:
+                schedule.succeeded(started)
+
+        #downstream work only when something new arrived
+        if inserted:
+            oss.update_headlines()
+            oss.refresh_materialized_views()
+            if export:
+                oss.export_views_to_excel()
+
+    return inserted
+
+
+def run_daemon(sources: list = None, batch_size: int = None, export: bool = True, once: bool = False, stop: threading.Event = None):
+    """
+    Runs due sources until SIGINT / SIGTERM (the current tick finishes first), or a single tick with once=True.
+    """
+    import http_cache
+    import oss
+
+    stop = stop or threading.Event()
+    if threading.current_thread() is threading.main_thread():
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+
+    schedules = [SourceSchedule(source_api, interval(source_api)) for source_api in (sources or oss.source_cols)]
+    for schedule in schedules:
+        #the schedule decides how fresh a source is: a response cached by the previous tick is always a little younger
+        #than the interval, so a TTL would serve it again. Scheduled fetches revalidate instead (usually a cheap 304).
+        http_cache.MAX_TTL[schedule.source_api] = 0
+        print(f"{schedule.source_api}: every {schedule.every / 60:.0f} min")
+
+    try:
+        while not stop.is_set():
+            due = [schedule for schedule in schedules if schedule.next_run <= time.time()]
+            if due:
+                try:
+                    with pipeline_lock():
+                        run_tick(due, batch_size, export)
+                except PipelineBusy as e:
+                    print(f"Skipping tick: {e}")
+                    for schedule in due:
+                        schedule.next_run = time.time() + 60
+                except Exception as e:
+                    #failures are handled per source in run_tick; this is the database / downstream side
+                    print(f"Tick failed: {e}")
+                    for schedule in due:
+                        schedule.failed(time.time())
+                if once:
+                    break
+
+            stop.wait(max(1.0, min(schedule.next_run for schedule in schedules) - time.time()))
+    finally:
+        oss.close_connection()
@@ -0,0 +1,169 @@
+# Streaming mode of the pipeline (python src/cli.py run-all --stream):
+
+#     source thread (one per API):  fetch page → drop stored → normalize / filter / classify → batch ─┐
+#                                                                                                  bounded queue
+#     loader (this thread):         archive batch → insert_records → watermark when a source is done ◄┘
+
+# Nothing waits for a whole source: the Spaceflight pages are already in PostgreSQL while Google is still being
+# queried. Each source holds one page and at most one unfinished batch, and the queue holds at most QUEUE_SIZE
+# batches, so memory depends on the batch size, not on max_records (only the stored / seen keys grow with it).
+# Headlines, the view refresh and the Excel export run once at the end, as in run_pipeline.
+
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import metrics
+import oss
+from exporting import get_or_raise, put_until_stopped
+
+BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", 500))  #classified records per insert
+QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", 4))  #batches waiting for the loader
+
+
+def raw_pages(source_api: str, gdelt_start=None, failures: list = None):
+    """
+    Fetched records of one source, one DataFrame (fetch format) per page / query / GDELT window.
+    gdelt_start: beginning of the GDELT harvest (default: its watermark, see oss.iter_gdelt_pages).
+    failures: list that gets the pages / windows that failed (see oss.fetch_watermark).
+    """
+    if source_api == "spaceflight_news":
+        published_after = oss.get_watermark("spaceflight_news")
+        for articles in oss.iter_spaceflight_pages(max_records=1000, published_after=published_after, failures=failures):
+            yield oss.make_spaceflight_df(articles)
+    elif source_api == "gdelt":
+        for articles in oss.iter_gdelt_pages(start=gdelt_start, failures=failures):
+            yield oss.make_gdelt_df(articles)
+    elif source_api == "google_news":
+        for rows in oss.iter_google_rows():
+            yield pd.DataFrame(rows)
+
+
+def stream_source(source_api: str, out: queue.Queue, stop: threading.Event, batch_size: int = BATCH_SIZE, pages=None,
+                  gdelt_start=None):
+    """
+    Source thread: classifies each page as it arrives and puts ("records", source_api, batch) on out
+    every batch_size records, then ("done", source_api, (new watermark, number of records fetched)),
+    or ("failed", source_api, exception). pages: raw frames to use instead of fetching (default raw_pages(source_api)).
+    The new watermark is the newest published date fetched, held back if pages / windows failed (see oss.fetch_watermark).
+    """
+    try:
+        with metrics.stage(f"stream.{source_api}") as step:
+            raw_col = oss.source_cols[source_api][1]
+            seen = oss.load_seen_keys(source_api)
+            latest = None
+            buffer, buffered, fetched, classified = [], 0, 0, 0
+            failures = []
+            if pages is None:
+                pages = raw_pages(source_api, gdelt_start, failures)
+
+            for raw in pages:
+                if stop.is_set():
+                    return
+                if raw.empty:
+                    continue
+                fetched += len(raw)
+
+                page_latest = oss.latest_published(raw, source_api)
+                if page_latest is not None and (latest is None or page_latest > latest):
+                    latest = page_latest
+
+                #records repeated across pages (ex. the same url in two Google queries) count as stored
+                unique = raw.drop_duplicates(subset=raw_col)
+                metrics.drop("duplicate_key", len(raw) - len(unique))
+                new = oss.drop_seen_records(unique, source_api, seen)
+                seen.update(new[raw_col].astype(str))
+
+                if source_api == "gdelt":
+                    new = oss.add_gdelt_flags(new)
+                events = oss.classify_frame(new, source_api)
+                if events.empty:
+                    continue
+
+                buffer.append(events)
+                buffered += len(events)
+                if buffered >= batch_size:
+                    put_until_stopped(out, ("records", source_api, pd.concat(buffer, ignore_index=True)), stop)
+                    classified += buffered
+                    buffer, buffered = [], 0
+
+            if buffer:
+                put_until_stopped(out, ("records", source_api, pd.concat(buffer, ignore_index=True)), stop)
+                classified += buffered
+            step.items_in, step.items_out = fetched, classified
+            step.set_value("failed_pages", len(failures))
+
+        put_until_stopped(out, ("done", source_api, (oss.fetch_watermark(source_api, latest, failures), fetched)), stop)
+    except Exception as e:
+        if not stop.is_set():
+            put_until_stopped(out, ("failed", source_api, e), stop)
+
+
+def load_sources(sources: dict, batch_size: int = BATCH_SIZE, queue_size: int = QUEUE_SIZE, gdelt_start=None) -> tuple[int, dict]:
+    """
+    Streams {source_api: pages (None = fetch)} into space_records and the archive (one run_id for all batches).
+    gdelt_start: beginning of the GDELT harvest when it is fetched (see raw_pages).
+    Returns (inserted records, {source_api: records fetched, or the exception that stopped the source}).
+    A failed source keeps its watermark and doesn't stop the others.
+    """
+    out = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    inserted = batches = 0
+    run_id = None
+    results = {}
+
+    if any(pages is None for pages in sources.values()):
+        oss.prune_http_cache()
+
+    with metrics.stage("stream") as step:
+        with ThreadPoolExecutor(max_workers=len(sources)) as pool:
+            try:
+                for source_api, pages in sources.items():
+                    pool.submit(stream_source, source_api, out, stop, batch_size, pages, gdelt_start)
+
+                while len(results) < len(sources):
+                    kind, source_api, payload = get_or_raise(out)
+                    if kind == "failed":
+                        print(f"{source_api} failed: {payload}")
+                        results[source_api] = payload
+                    elif kind == "done":
+                        latest, results[source_api] = payload
+                        oss.save_watermark(source_api, latest)
+                    else:
+                        with metrics.stage("archive", len(payload)):
+                            run_id = oss.append_archive(payload, run_id=run_id, batch=batches)
+                        inserted += oss.insert_records(payload)
+                        batches += 1
+            finally:
+                stop.set()
+        step.items_out = inserted
+        step.set_value("batches", batches)
+
+    return inserted, results
+
+
+def run_streaming(batch_size: int = BATCH_SIZE, queue_size: int = QUEUE_SIZE, export: bool = True):
+    """
+    Full run with overlapping stages (see the top of this file). Returns the number of inserted records.
+    A source's watermark only moves once all of its batches are in the database; a failed source fails the run
+    after the others are loaded and exported.
+    """
+    with metrics.run("run-all"):
+        inserted, results = load_sources(dict.fromkeys(oss.source_cols), batch_size, queue_size)
+
+        print("Total new records: ", oss.count_records())
+        if inserted:
+            oss.update_headlines()
+            oss.refresh_materialized_views()
+        if export:
+            oss.export_views_to_excel()
+        oss.close_connection()
+
+        for result in results.values():
+            if isinstance(result, Exception):
+                raise result
+
+    return inserted
@@ -0,0 +1,84 @@
+# Parallel tagging engine:
+
+# Splits records into chunks and classifies them across a process pool (one process per core by default).
+# Each worker compiles the lexicon matcher once, and results come back in input order.
+# Used by categorize_records (large batches) and by the retag functions in oss.py.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pandas as pd
+
+CHUNK_SIZE = int(os.getenv("TAG_CHUNK_SIZE", 5000))
+WORKERS = int(os.getenv("TAG_WORKERS", 0)) or os.cpu_count() or 1
+
+
+def _init_worker():
+    """
+    Runs once per worker process: compiles the country / entity matcher before any chunk arrives.
+    """
+    import classify
+    classify.classify_tags("")
+
+
+def _tag_chunk(texts: list) -> list:
+    import classify
+    return [classify.classify_tags(text) for text in texts]
+
+
+def _classify_chunk(df: pd.DataFrame, source_api: str) -> pd.DataFrame:
+    import oss
+    return oss.classify_frame(df, source_api)
+
+
+def start_pool(workers: int = None):
+    """
+    Process pool that can be reused across several tag_texts calls (None when a single worker is enough).
+    """
+    workers = workers or WORKERS
+    if workers <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+
+
+def map_chunks(func, chunks: list, workers: int = None, pool: ProcessPoolExecutor = None) -> list:
+    """
+    Apply func to every chunk across a process pool, results in chunk order.
+    A single chunk or a single worker runs in this process (no pool start-up cost).
+    """
+    if pool is not None:
+        return list(pool.map(func, chunks))
+
+    workers = min(workers or WORKERS, len(chunks))
+    if workers <= 1:
+        return [func(chunk) for chunk in chunks]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        return list(pool.map(func, chunks))
+
+
+def tag_texts(texts, workers: int = None, chunk_size: int = None, pool: ProcessPoolExecutor = None) -> list:
+    """
+    (countries, entities) for every text, in the same order as texts.
+    """
+    chunk_size = chunk_size or CHUNK_SIZE
+    texts = [str(text) for text in texts]
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+
+    return [tags for chunk_tags in map_chunks(_tag_chunk, chunks, workers, pool) for tags in chunk_tags]
+
+
+def classify_parallel(df: pd.DataFrame, source_api: str, workers: int = None, chunk_size: int = None) -> pd.DataFrame:
+    """
+    classify_frame over row chunks of df, concatenated back in the original row order.
+    """
+    chunk_size = chunk_size or CHUNK_SIZE
+    chunks = [df.iloc[i:i + chunk_size] for i in range(0, len(df), chunk_size)]
+    if not chunks:
+        chunks = [df]
+
+    frames = map_chunks(partial(_classify_chunk, source_api=source_api), chunks, workers)
+    frames = [frame for frame in frames if not frame.empty] or frames[:1]
+
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,52 @@
+# Regression test for the record classifiers (classify.py): every record of data/space_records.csv is classified
+# again and compared with tests/data/expected_tags.json (keyword flags, event type, country / entity tags).
+# After a lexicon or classifier change that is meant to change the tags, check the differences and regenerate it with
+#     python tests/test_classify_regression.py
+
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+import classify  # noqa: E402
+
+RECORDS_FILE = ROOT / "data" / "space_records.csv"
+EXPECTED_FILE = Path(__file__).resolve().parent / "data" / "expected_tags.json"
+
+
+def classify_records() -> list:
+    """
+    [{space, security, event_type, countries, entities}] for every record, in file order.
+    """
+    records = pd.read_csv(RECORDS_FILE, usecols=["title", "summary"]).fillna("")
+    rows = []
+    for title, summary in zip(records["title"], records["summary"]):
+        text = classify.address_text_issues(f"{title} {summary}")
+        countries, entities = classify.classify_tags(text)
+        rows.append({
+            "space": classify.contains(text, classify.space_words),
+            "security": classify.contains(text, classify.security_words),
+            "event_type": classify.classify_event(text),
+            "countries": countries,
+            "entities": entities,
+        })
+    return rows
+
+
+def test_tags_match_expected():
+    expected = json.loads(EXPECTED_FILE.read_text(encoding="utf-8"))
+    rows = classify_records()
+    assert len(rows) == len(expected["records"])
+    mismatches = [i for i, (row, want) in enumerate(zip(rows, expected["records"])) if row != want]
+    assert not mismatches, f"{len(mismatches)} records classified differently, first: {mismatches[:5]}"
+
+
+if __name__ == "__main__":
+    EXPECTED_FILE.parent.mkdir(parents=True, exist_ok=True)
+    rows = classify_records()
+    EXPECTED_FILE.write_text(json.dumps({"records": rows}, ensure_ascii=False, indent=1), encoding="utf-8")
+    print(f"{len(rows)} records → {EXPECTED_FILE}")
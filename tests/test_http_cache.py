@@ -0,0 +1,76 @@
+# Response cache (http_cache.py) as the fetchers use it: the network is replaced by a stub transport that
+# answers with canned GDELT responses, and the cache lives in a temporary folder.
+
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import http_cache  # noqa: E402
+import oss  # noqa: E402
+
+RATE_LIMITED = b"Please limit requests to one every 5 seconds or contact kalev.leetaru5@gmail.com for larger queries."
+
+
+def respond(body: bytes, content_type: str) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.encoding = "utf-8"
+    response._content = body
+    response.headers["Content-Type"] = content_type
+    return response
+
+
+def test_gdelt_rate_limit_is_retried_over_the_network(tmp_path, monkeypatch):
+    answers = [
+        respond(RATE_LIMITED, "text/html"),
+        respond(json.dumps({"articles": [{"url": "https://example.com/a", "title": "satellite"}]}).encode(), "application/json"),
+    ]
+    sent = []
+
+    def transport(self, method, url, **kwargs):
+        sent.append(kwargs.get("params"))
+        return answers[min(len(sent), len(answers)) - 1]
+
+    monkeypatch.setattr(http_cache, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(http_cache, "MODE", "cache")
+    monkeypatch.setattr(requests.Session, "request", transport)
+    monkeypatch.setattr("fetching.time.sleep", lambda seconds: None)
+
+    failures = []
+    pages = list(oss.iter_gdelt_pages(datetime(2026, 1, 10, tzinfo=timezone.utc), datetime(2026, 1, 10, 6, tzinfo=timezone.utc),
+                                      rate=1000, failures=failures))
+
+    assert len(sent) == 2
+    assert sent[0] == sent[1]
+    assert pages == [[{"url": "https://example.com/a", "title": "satellite"}]]
+    assert failures == []
+
+    #the accepted response is now cached: the same window needs no request
+    assert list(oss.iter_gdelt_pages(datetime(2026, 1, 10, tzinfo=timezone.utc), datetime(2026, 1, 10, 6, tzinfo=timezone.utc), rate=1000)) == pages
+    assert len(sent) == 2
+
+
+def test_prune_keeps_recent_and_recorded_responses(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, "MODE", "cache")
+    cache = http_cache.ResponseCache("gdelt", tmp_path)
+    response = respond(b'{"articles": []}', "application/json")
+    cache.store("old", "https://example.com", {"window": 1}, response)
+    cache.store("recorded", "https://example.com", {"window": 2}, response, recorded=True)
+    cache.store("recent", "https://example.com", {"window": 3}, response)
+
+    week_ago = time.time() - 8 * 24 * 60 * 60
+    for key in ("old", "recorded"):
+        for suffix in (".json", ".body"):
+            os.utime(tmp_path / "gdelt" / f"{key}{suffix}", (week_ago, week_ago))
+
+    assert http_cache.prune(cache_dir=tmp_path) == 1
+    assert cache.load("old") is None
+    assert cache.load("recorded") is not None
+    assert cache.load("recent") is not None